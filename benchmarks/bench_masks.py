@@ -0,0 +1,94 @@
+"""
+Check the interval masks and the exact coverage of MaskGenerator, and time the span restricted combine
+against the dense one.
+
+Run from the repository root: python -m benchmarks.bench_masks
+"""
+import time
+import numpy as np
+from generators.intervals import IntervalMask
+from generators.mask import MaskGenerator
+from generators.mask_sigmoids import SigmoidMaskGenerator
+from generators.normal import NormalGenerator
+
+
+def check_round_trip():
+    """from_dense / to_dense keep the masked points and their weights, sparse generators match the dense ones."""
+    for mask in [
+        MaskGenerator((500, 6), cluster_size=20, cluster_variance=5, seed=0).generate(4),
+        SigmoidMaskGenerator((500, 6), num_peaks=4, peak_length=40, length_variance=10, seed=0).generate(4),
+    ]:
+        interval_mask = IntervalMask.from_dense(mask)
+        assert interval_mask.size == np.count_nonzero(mask)
+        assert np.array_equal(interval_mask.to_dense(mask.dtype), mask)
+
+    dense = MaskGenerator((500, 6), cluster_size=20, cluster_variance=5, seed=1).generate(4)
+    sparse = MaskGenerator((500, 6), cluster_size=20, cluster_variance=5, sparse=True, seed=1).generate(4)
+    assert np.array_equal(sparse.to_dense(), dense)
+
+
+def check_indexing():
+    """`mask[b]` and `mask.take(batches)` select the same points and weights as on the dense mask."""
+    dense = SigmoidMaskGenerator((400, 5), num_peaks=3, peak_length=30, length_variance=8, seed=2).generate(6)
+    interval_mask = IntervalMask.from_dense(dense)
+    for batch in range(len(dense)):
+        assert np.array_equal(interval_mask[batch].to_dense(dense.dtype), dense[batch])
+
+    for batches in [np.array([4, 1, 3]), np.array([0]), np.arange(6)[::-1]]:
+        assert np.array_equal(interval_mask.take(batches).to_dense(dense.dtype), dense[batches])
+
+
+def check_window():
+    """`mask.window(start, length)` selects the same points and weights as the dense mask repeated along time."""
+    dense = SigmoidMaskGenerator((400, 5), num_peaks=3, peak_length=30, length_variance=8, seed=3).generate(2)
+    interval_mask = IntervalMask.from_dense(dense)
+    for start, length in [(0, 400), (37, 100), (350, 100), (790, 1000), (1200, 1)]:
+        expected = np.take(dense, np.arange(start, start + length) % 400, axis=-2)
+        assert np.array_equal(interval_mask.window(start, length).to_dense(dense.dtype), expected)
+
+
+def check_coverage():
+    """Every active variate gets exactly int(seq_len * intra_variates_probability) masked points."""
+    seq_len = 1_000
+    for cluster_size, cluster_variance in [(1, 0), (10, 3), (50, 10), (400, 100)]:
+        for intra in [0.05, 0.3, 0.9]:
+            generator = MaskGenerator(
+                (seq_len, 16), inter_variates_probability=0.5, intra_variates_probability=intra,
+                cluster_size=cluster_size, cluster_variance=cluster_variance, seed=3,
+            )
+            counts = generator.generate(8).sum(axis=1)
+            assert set(np.unique(counts)) <= {0, int(seq_len * intra)}, (cluster_size, intra, np.unique(counts))
+
+
+def timeit(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    check_round_trip()
+    check_indexing()
+    check_window()
+    check_coverage()
+    print("interval masks and mask coverage: ok")
+
+    shape = (1_000_000, 16)
+    generator = NormalGenerator(shape, combine_domain="time", combine_mode="add", seed=0)
+    ts, generated_ts = np.zeros(shape), generator.generate()
+    for density in [0.002, 0.02, 0.2]:
+        sparse = MaskGenerator(
+            shape, inter_variates_probability=1.0, intra_variates_probability=density, cluster_size=50, sparse=True, seed=0
+        ).generate()
+        dense = sparse.to_dense()
+
+        # With `out` the generated TS is scratch memory, its values don't matter for the timing
+        dense_time = timeit(lambda: generator.combine(ts, generated_ts, dense, out=ts))
+        sparse_time = timeit(lambda: generator.combine(ts, generated_ts, sparse, out=ts))
+        print(
+            f"{str(shape):>14} density {density:6.1%}  dense {dense_time * 1e3:8.2f} ms  "
+            f"spans {sparse_time * 1e3:8.2f} ms  speedup {dense_time / sparse_time:6.1f}x"
+        )
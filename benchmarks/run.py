@@ -0,0 +1,202 @@
+"""
+Throughput and peak memory of every generator and of the main.py Some pipeline over a grid of shapes.
+
+Run from the repository root:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --seq-len 1000 10000 --no-variates 4 --batch-size 1 64 --only normal pipeline
+    python -m benchmarks.run --compare before.json after.json
+
+Time is the best of `--repeat` runs; peak memory is measured with tracemalloc in a separate run, so that
+tracing does not slow down the timed ones. Results are written as JSON, with the commit and versions they
+were measured at, and two files can be compared run by run.
+"""
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable
+import numpy as np
+from generators.costant import CostantGenerator
+from generators.drift import DriftGenerator
+from generators.exponential import ExponentialGenerator
+from generators.gamma import GammaGenerator
+from generators.laplace import LaplaceGenerator
+from generators.mask import MaskGenerator
+from generators.mask_sigmoids import SigmoidMaskGenerator
+from generators.normal import NormalGenerator
+from generators.pink_noise import PinkNoiseGenerator
+from generators.poisson import PoissonGenerator
+from generators.sinusoid import SinusoidGenerator
+from generators.utils import Maybe, Some
+
+
+GENERATORS: dict[str, Callable] = {
+    "normal": lambda shape: NormalGenerator(shape, mean=0, std=0.01),
+    "exponential": lambda shape: ExponentialGenerator(shape, scale=0.02),
+    "gamma": lambda shape: GammaGenerator(shape, shape_param=2.0, scale=0.01),
+    "laplace": lambda shape: LaplaceGenerator(shape, loc=0, scale=0.05),
+    "poisson": lambda shape: PoissonGenerator(shape, lam=0.5),
+    "pink_noise": lambda shape: PinkNoiseGenerator(shape, alpha=1.0, amplitude=0.1),
+    "sinusoid": lambda shape: SinusoidGenerator(shape, amplitude=0.5, phase=np.pi, max_frequency=5),
+    "costant": lambda shape: CostantGenerator(shape, gen_fraction=0.02, gen_value=0.01, gen_length=5, gen_length_variance=2),
+    "drift": lambda shape: DriftGenerator(shape, drift_type="exponential", drift_rate=0.01, random_drift=True),
+    "mask": lambda shape: MaskGenerator(shape),
+    "sigmoid_mask": lambda shape: SigmoidMaskGenerator(
+        shape, num_peaks=4, peak_length=max(1, shape[0] // 10), length_variance=max(1, shape[0] // 20), steepness=0.15
+    ),
+}
+
+
+def build_pipeline(shape: tuple[int, int]) -> tuple[SinusoidGenerator, SigmoidMaskGenerator, Some]:
+    """The pipeline of main.py: base, mask and the Some of its nine anomalies."""
+    base = GENERATORS["sinusoid"](shape)
+    mask = GENERATORS["sigmoid_mask"](shape)
+    time_domain = dict(combine_domain="time", combine_mode="add")
+    some = Some(
+        [
+            Maybe(NormalGenerator(shape, mean=0, std=0.01, **time_domain), probability=1),
+            Maybe(LaplaceGenerator(shape, loc=0, scale=0.05, **time_domain), probability=0.7),
+            Maybe(ExponentialGenerator(shape, scale=0.02, **time_domain), probability=0.5),
+            Maybe(GammaGenerator(shape, shape_param=2.0, scale=0.01, **time_domain), probability=0.4),
+            Maybe(PoissonGenerator(shape, lam=0.5, **time_domain), probability=0.3),
+            Maybe(PinkNoiseGenerator(shape, alpha=1.0, amplitude=0.1, **time_domain), probability=0.6),
+            Maybe(SinusoidGenerator(shape, amplitude=0.1, phase=2 * np.pi, max_frequency=7, **time_domain), probability=1),
+            Maybe(
+                CostantGenerator(shape, gen_fraction=0.02, gen_value=0.01, gen_length=5, gen_length_variance=2, **time_domain),
+                probability=0.3,
+            ),
+            Maybe(
+                DriftGenerator(shape, drift_type="exponential", drift_rate=0.01, random_drift=True, **time_domain),
+                probability=0.5,
+            ),
+        ],
+        shuffle=True,
+        max_generators=5,
+        seed=0,
+    )
+    return base, mask, some
+
+
+def make_case(name: str, shape: tuple[int, int], batch_size: int) -> Callable[[], object]:
+    """Function generating one batch of the benchmark `name`, built with fixed seeds."""
+    np.random.seed(0)
+    if name == "pipeline":
+        base, mask, some = build_pipeline(shape)
+        return lambda: some.generate_and_combine(base.generate(batch_size), mask.generate(batch_size))
+
+    generator = GENERATORS[name](shape)
+    return lambda: generator.generate(batch_size)
+
+
+def measure(run: Callable[[], object], repeat: int) -> tuple[float, int]:
+    """Best time of `repeat` runs and peak traced memory of one more run."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def run_benchmarks(
+    names: list[str], seq_lens: list[int], no_variates: list[int], batch_sizes: list[int], repeat: int
+) -> list[dict]:
+    results = []
+    for name, seq_len, variates, batch_size in itertools.product(names, seq_lens, no_variates, batch_sizes):
+        shape = (seq_len, variates)
+        seconds, peak = measure(make_case(name, shape, batch_size), repeat)
+        result = {
+            "name": name,
+            "seq_len": seq_len,
+            "no_variates": variates,
+            "batch_size": batch_size,
+            "seconds": seconds,
+            "samples_per_s": batch_size / seconds,
+            "points_per_s": batch_size * seq_len * variates / seconds,
+            "peak_bytes": peak,
+        }
+        results.append(result)
+        print(
+            f"{name:>13} {seq_len:>8} x {variates:<4} batch {batch_size:<5} "
+            f"{seconds * 1e3:10.3f} ms {result['samples_per_s']:12.1f} samples/s "
+            f"{result['points_per_s'] / 1e6:9.2f} Mpoints/s {peak / 2**20:9.2f} MiB peak"
+        )
+    return results
+
+
+def compare(before_path: str, after_path: str):
+    """Print the speedup and the memory ratio of every run found in both files."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    key = lambda result: (result["name"], result["seq_len"], result["no_variates"], result["batch_size"])
+    previous = {key(result): result for result in before["results"]}
+    print(f"{before['meta']['commit']} -> {after['meta']['commit']}")
+    for result in after["results"]:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        name, seq_len, variates, batch_size = key(result)
+        print(
+            f"{name:>13} {seq_len:>8} x {variates:<4} batch {batch_size:<5} "
+            f"speedup {old['seconds'] / result['seconds']:6.2f}x  "
+            f"peak memory {result['peak_bytes'] / max(old['peak_bytes'], 1):6.2f}x"
+        )
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seq-len", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--no-variates", type=int, nargs="+", default=[4, 32])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 64])
+    parser.add_argument("--only", nargs="+", choices=[*GENERATORS, "pipeline"], help="benchmarks to run, all by default")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs of every case, the best one is kept")
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    names = args.only or [*GENERATORS, "pipeline"]
+    results = run_benchmarks(names, args.seq_len, args.no_variates, args.batch_size, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Synthetic time series and anomaly generators.
+
+Nothing is imported until it is used: `generators.NormalGenerator` or `get_generator("normal")` import just the
+module of the generator, so short-lived worker processes only pay for what they generate.
+"""
+from importlib import import_module
+
+
+# Registry name -> (module, class) of the generators
+_GENERATORS = {
+    "normal": (".normal", "NormalGenerator"),
+    "exponential": (".exponential", "ExponentialGenerator"),
+    "gamma": (".gamma", "GammaGenerator"),
+    "laplace": (".laplace", "LaplaceGenerator"),
+    "poisson": (".poisson", "PoissonGenerator"),
+    "pink_noise": (".pink_noise", "PinkNoiseGenerator"),
+    "sinusoid": (".sinusoid", "SinusoidGenerator"),
+    "costant": (".costant", "CostantGenerator"),
+    "drift": (".drift", "DriftGenerator"),
+    "mask": (".mask", "MaskGenerator"),
+    "sigmoid_mask": (".mask_sigmoids", "SigmoidMaskGenerator"),
+}
+
+# Other public names -> module
+_ATTRIBUTES = {
+    "BaseGenerator": ".base",
+    "PointwiseGenerator": ".base",
+    "make_rng": ".base",
+    "Maybe": ".utils",
+    "Some": ".utils",
+    "Pipeline": ".dataset",
+    "build_dataset": ".dataset",
+    "Emitter": ".stream",
+    "IntervalMask": ".intervals",
+    "Labels": ".labels",
+    "Hook": ".hooks",
+    "PrintHook": ".hooks",
+    "ProfileHook": ".hooks",
+    **{class_name: module for module, class_name in _GENERATORS.values()},
+}
+
+__all__ = [*_ATTRIBUTES, "get_generator", "register_generator", "available_generators"]
+
+
+def _resolve(module: str, attribute: str):
+    return getattr(import_module(module, __name__), attribute)
+
+
+def get_generator(name: str) -> type:
+    """
+    Generator class from its registry name (e.g. "normal", "sigmoid_mask") or its class name.
+
+    Only the module of the generator is imported.
+    """
+    if name in _GENERATORS:
+        return _resolve(*_GENERATORS[name])
+    for module, class_name in _GENERATORS.values():
+        if class_name == name:
+            return _resolve(module, class_name)
+    raise KeyError(f"Unknown generator {name!r}, available: {', '.join(available_generators())}.")
+
+
+def register_generator(name: str, module: str, class_name: str):
+    """
+    Add a generator to the registry, imported on first use. The class is also available as `generators.<class_name>`.
+
+    Args:
+        name (str): registry name.
+        module (str): absolute module path, or relative to this package if it starts with a dot.
+        class_name (str): name of the generator class in the module.
+    """
+    _GENERATORS[name] = (module, class_name)
+    _ATTRIBUTES[class_name] = module
+    # A class of the same name resolved before is replaced
+    globals().pop(class_name, None)
+    if class_name not in __all__:
+        __all__.append(class_name)
+
+
+def available_generators() -> list[str]:
+    return list(_GENERATORS)
+
+
+def __getattr__(name: str):
+    if name in _ATTRIBUTES:
+        value = _resolve(_ATTRIBUTES[name], name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return [*globals(), *_ATTRIBUTES]
@@ -1,6 +1,34 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Literal
+from typing import Any, Dict, Iterator, Literal
+import itertools
 import numpy as np
+from .intervals import IntervalMask
+
+
+SeedLike = int | np.random.SeedSequence | np.random.Generator | None
+
+
+def make_rng(seed: SeedLike = None) -> np.random.Generator:
+    """
+    Build a np.random.Generator from a seed, a SeedSequence or an existing Generator.
+
+    With seed None the stream is seeded from the global NumPy state, so `utils.setSeed` keeps runs reproducible.
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    if seed is None:
+        seed = np.random.randint(0, 2**31, size=4)
+    return np.random.default_rng(seed)
+
+
+def to_frequency(ts: np.ndarray) -> np.ndarray:
+    """One-sided spectrum of a real TS along the time axis."""
+    return np.fft.rfft(ts, axis=-2)
+
+
+def to_time(spectrum: np.ndarray, seq_len: int) -> np.ndarray:
+    """Real TS of length seq_len from its one-sided spectrum."""
+    return np.fft.irfft(spectrum, n=seq_len, axis=-2)
 
 
 class BaseGenerator(ABC):
@@ -10,6 +38,8 @@ class BaseGenerator(ABC):
         ts: np.ndarray | None = None,
         combine_domain: Literal["time", "frequency"] = None,
         combine_mode: Literal["add", "mul"] | None = None,
+        seed: SeedLike = None,
+        dtype: np.dtype = np.float64,
     ):
         """
         Initialize the BaseGenerator.
@@ -19,6 +49,8 @@ class BaseGenerator(ABC):
             ts: (np.ndarray): time series to "clone" as of shape and other stuff, not clone in the literal sense.
             combine_domain (str): Domain in which the combine operation happens when `apply` method is called ('time' or 'frequency').
             combine_mode (str): Mode in which the combine operation happens when `apply` method is called ('add' or 'mul').
+            seed: (int | SeedSequence | np.random.Generator): seed of the random stream of the generator. If None it is drawn from the global NumPy state.
+            dtype: (np.dtype): float type of the generated TS, e.g. np.float32 to halve memory and bandwidth.
 
         """
 
@@ -40,63 +72,325 @@ class BaseGenerator(ABC):
 
         self.combine_mode = combine_mode
 
+        self.dtype = np.dtype(dtype)
+        self.reseed(seed)
+
+    def reseed(self, seed: SeedLike = None):
+        """Replace the random stream of the generator."""
+        self.rng = make_rng(seed)
+
+    # Let NumPy defer `array + generator` and `array * generator` to the lazy expressions below
+    __array_ufunc__ = None
+
+    def __add__(self, other):
+        """Lazy sum, see `expr`."""
+        from .expr import as_expr
+        return as_expr(self) + other
+
+    def __radd__(self, other):
+        from .expr import as_expr
+        return other + as_expr(self)
+
+    def __mul__(self, other):
+        """Lazy product, see `expr`."""
+        from .expr import as_expr
+        return as_expr(self) * other
+
+    def __rmul__(self, other):
+        from .expr import as_expr
+        return other * as_expr(self)
+
+    # Generators of i.i.d. values, see `PointwiseGenerator`
+    pointwise = False
+
     @abstractmethod
-    def generate(self) -> np.ndarray:
+    def _generate(self, shape: tuple[int, int, int], out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Generate a batch of TS.
+
+        Args:
+            shape (tuple[int, int, int]): (batch_size, seq_len, no_variates)
+            out (np.ndarray | None): optional buffer of the given shape to write into. Generators that can't
+                write in place may ignore it and return a new array, `generate` copies it into `out`.
+
+        Returns:
+            np.ndarray: array of the given shape
+        """
         raise NotImplementedError("Can't generate with base generator.")
 
-    def get_base_ts(self) -> np.ndarray:
+    def generate(self, batch_size: int | None = None, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Generate the TS.
+
+        Args:
+            batch_size (int | None): number of TS to generate at once. If None a single
+                (seq_len, no_variates) TS is returned, otherwise a (batch_size, seq_len, no_variates) batch.
+            out (np.ndarray | None): optional buffer of the output shape the TS is written into (and returned),
+                its dtype takes the place of the generator dtype. Sparse generators write the dense mask into it.
+        """
+        shape = self.batch_shape(batch_size)
+        if out is None:
+            ts = self._generate(shape)
+            return ts if batch_size is not None else ts[0]
+
+        batch_out = out if batch_size is not None else out[None]
+        assert batch_out.shape == shape
+        ts = self._generate(shape, batch_out)
+        if isinstance(ts, IntervalMask):
+            # Sparse generators write the equivalent dense mask
+            batch_out.fill(0)
+            batch_out[ts.indices()] = ts.values(batch_out.dtype)
+        elif ts is not batch_out:
+            np.copyto(batch_out, ts)
+        return out
+
+    def new_ts(self, shape: tuple[int], out: np.ndarray | None = None) -> np.ndarray:
+        """`out` if given, otherwise a new uninitialized TS of the generator dtype."""
+        return out if out is not None else np.empty(shape, dtype=self.dtype)
+
+    def batch_shape(self, batch_size: int | None = None) -> tuple[int, int, int]:
+        return (1 if batch_size is None else batch_size, self.seq_len, self.no_variates)
+
+    def generate_chunks(
+        self, chunk_len: int, n_chunks: int | None = None, batch_size: int | None = None
+    ) -> Iterator[np.ndarray]:
+        """
+        Generate an arbitrarily long TS chunk by chunk.
+
+        Consecutive chunks are parts of the same TS: generators with a state (phase, drift, runs crossing the
+        chunk boundary, ...) carry it over from one chunk to the next. `seq_len` keeps defining the time scale
+        of the generator (e.g. the period of the sinusoid), not the length of the stream.
+
+        Args:
+            chunk_len (int): length of each chunk.
+            n_chunks (int | None): number of chunks to generate. If None the iterator never ends.
+            batch_size (int | None): as in `generate`, chunks are (batch_size, chunk_len, no_variates) if given.
+        """
+        shape = (1 if batch_size is None else batch_size, chunk_len, self.no_variates)
+        state = self._init_stream(shape)
+        for _ in itertools.count() if n_chunks is None else range(n_chunks):
+            chunk = self._generate_chunk(shape, state)
+            yield chunk if batch_size is not None else chunk[0]
+
+    def _init_stream(self, shape: tuple[int, int, int]) -> Dict[str, Any]:
+        """Initial state of a stream of chunks of the given shape."""
+        return {}
+
+    def _generate_chunk(self, shape: tuple[int, int, int], state: Dict[str, Any]) -> np.ndarray:
+        """Generate the next chunk of a stream, updating `state`. Stateless generators just generate a new TS."""
+        return self._generate(shape)
+
+    def get_base_ts(self, shape: tuple[int] | None = None, out: np.ndarray | None = None) -> np.ndarray:
+        if shape is None:
+            shape = self.shape if out is None else out.shape
+
+        out = self.new_ts(shape, out)
+        out.fill(self.neutral_value)
+        return out
+
+    @property
+    def neutral_value(self) -> float:
+        """Value of the generated TS that leaves the input unchanged when combined."""
         match self.combine_mode:
             case "add":
-                return np.zeros(self.shape)
+                return 0.0
             case "mul":
-                return np.ones(self.shape)
+                return 1.0
             case default:
                 raise ValueError("Combine Mode not accepted")
 
     def combine(
-        self, ts: np.ndarray, generated_ts: np.ndarray, mask_ts: np.ndarray = None
+        self,
+        ts: np.ndarray,
+        generated_ts: np.ndarray,
+        mask_ts: np.ndarray = None,
+        transform: bool = True,
+        out: np.ndarray | None = None,
     ):
-        assert ts.shape == generated_ts.shape
+        """
+        Combine the generated TS into the input TS.
+
+        In the frequency domain the input is moved to its one-sided spectrum (rfft along the time axis) and the
+        first seq_len // 2 + 1 steps of the generated TS and of the mask are used as real offsets ('add') or
+        gains ('mul') of the frequency bins.
+
+        Args:
+            ts (np.ndarray): Input time series, (seq_len, no_variates) or batched (batch_size, seq_len, no_variates).
+            generated_ts (np.ndarray): Generated time series, (batch_size,) seq_len, no_variates.
+            mask_ts (np.ndarray | IntervalMask): Optional mask, same shape of `generated_ts` or broadcastable to it
+                (e.g. a single (seq_len, no_variates) mask for the whole batch). In 'mul' mode the masked points are
+                scaled by 1 + mask * (generated_ts - 1), the others are left unchanged. With an IntervalMask only
+                the masked spans are touched.
+            transform (bool): If False and the combine domain is 'frequency', `ts` is already a spectrum
+                (see `to_frequency`) and the spectrum is returned, so that many frequency domain generators
+                can be applied with a single pair of transforms.
+            out (np.ndarray | None): Optional output buffer with the shape of the result, it can be `ts` itself.
+                When given, `generated_ts` is used as scratch memory and overwritten.
+        """
         assert self.combine_mode and self.combine_domain
         if mask_ts is not None:
-            assert ts.shape == mask_ts.shape
-           
-        if self.combine_domain == "frequency":
-            ts = np.fft.fft(ts, axis=0)
+            assert np.broadcast_shapes(generated_ts.shape, mask_ts.shape) == generated_ts.shape
+
+        frequency = self.combine_domain == "frequency"
+        if frequency:
+            seq_len = generated_ts.shape[-2]
+            if transform:
+                assert ts.shape == generated_ts.shape
+                ts = to_frequency(ts)
+            if isinstance(mask_ts, IntervalMask):
+                mask_ts = mask_ts.to_dense(generated_ts.dtype)
+            no_freqs = ts.shape[-2]
+            generated_ts = generated_ts[..., :no_freqs, :]
+            if mask_ts is not None:
+                mask_ts = mask_ts[..., :no_freqs, :]
+        else:
+            assert ts.shape == generated_ts.shape
+
+        if isinstance(mask_ts, IntervalMask):
+            return self._combine_spans(ts, generated_ts, mask_ts, out)
+
+        # The spectrum is a temporary anyway: work on it in place and write the TS into `out` at the end
+        target = ts if out is not None and frequency and transform else out
+
+        # A masked 'mul' scales the masked points only: ts * (1 + mask * (generated_ts - 1))
+        if target is not None:
+            if mask_ts is not None:
+                generated_ts -= self.neutral_value
+                generated_ts *= mask_ts
+                generated_ts += self.neutral_value
+            match self.combine_mode:
+                case "add":
+                    ts = np.add(ts, generated_ts, out=target)
+                case "mul":
+                    ts = np.multiply(ts, generated_ts, out=target)
+        else:
+            match self.combine_mode:
+                case "add":
+                    if mask_ts is not None:
+                        ts = ts + mask_ts * generated_ts
+                    else:
+                        ts = ts + generated_ts
+
+                case "mul":
+                    if mask_ts is not None:
+                        ts = ts * (1 + mask_ts * (generated_ts - 1))
+                    else:
+                        ts = ts * generated_ts
+
+        if frequency and transform:
+            ts = to_time(ts, seq_len)
+            if out is not None:
+                np.copyto(out, ts)
+                ts = out
+
+        return ts
+
+    def _combine_spans(
+        self, ts: np.ndarray, generated_ts: np.ndarray, mask_ts: IntervalMask, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Time domain combine restricted to the spans of an interval mask, the cost is proportional to the masked points.
+
+        When `out` is given the masked generated values are written back into `generated_ts`.
+        """
+        index = mask_ts.indices(ts.ndim)
+        values = generated_ts[index]
+        ts = self._combine_at(ts, index, values, mask_ts.weights, out)
+        if out is not None:
+            generated_ts[index] = values
+        return ts
+
+    def _combine_at(
+        self,
+        ts: np.ndarray,
+        index: tuple,
+        values: np.ndarray,
+        weights: np.ndarray | None = None,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Combine `values` into ts[index], masking them in place with `weights` if given."""
+        if out is None:
+            out = ts.copy()
+        elif out is not ts:
+            np.copyto(out, ts)
+
+        if weights is not None:
+            values -= self.neutral_value
+            values *= weights
+            values += self.neutral_value
 
         match self.combine_mode:
             case "add":
-                if mask_ts is not None:
-                    ts = ts + mask_ts * generated_ts
-                else:
-                    ts = ts + generated_ts
-
+                out[index] += values
             case "mul":
-                if mask_ts is not None:
-                    ts = ts * mask_ts * generated_ts
-                else:
-                    ts = ts * generated_ts
+                out[index] *= values
 
-        if self.combine_mode == "frequency":
-            ts = np.fft.ifft(ts, axis=0).real
+        return out
 
-        return ts
+    def support(self, mask_ts: np.ndarray | IntervalMask, ndim: int) -> tuple[tuple, np.ndarray | None]:
+        """
+        Index and values of the non zero points of a mask.
+
+        Args:
+            mask_ts (np.ndarray | IntervalMask): dense or interval mask.
+            ndim (int): number of dimensions of the indexed TS, a single mask indexes every TS of a batch.
+
+        Returns:
+            tuple: (index, weights), weights is None for boolean and interval masks without weights.
+        """
+        if isinstance(mask_ts, IntervalMask):
+            return mask_ts.indices(ndim), mask_ts.weights
+
+        index = np.nonzero(mask_ts)
+        weights = mask_ts[index] if mask_ts.dtype != np.bool_ else None
+        if mask_ts.ndim < ndim:
+            index = (slice(None), *index)
+        return index, weights
+
+    def combine_on_support(
+        self, ts: np.ndarray, mask_ts: np.ndarray | IntervalMask, out: np.ndarray | None = None
+    ) -> tuple[np.ndarray, tuple, np.ndarray]:
+        """
+        Pointwise generators only: draw values just for the non zero points of the mask and combine them there,
+        instead of generating a whole TS that the mask mostly throws away.
+
+        Returns:
+            tuple: (ts, index of the masked points, masked values combined into them)
+        """
+        assert self.pointwise and self.combine_domain == "time"
+        # Same result dtype as the dense `combine`
+        dtype = np.result_type(ts.dtype, self.dtype)
+        if out is None:
+            ts = out = ts.astype(dtype)
+        index, weights = self.support(mask_ts, ts.ndim)
+        values = self.sample(ts[index].shape, dtype)
+        ts = self._combine_at(ts, index, values, weights, out)
+        return ts, index, values
 
     def generate_and_combine(
-        self, ts: np.ndarray, mask_ts: np.ndarray = None
+        self, ts: np.ndarray, mask_ts: np.ndarray = None, transform: bool = True, out: np.ndarray | None = None
     ) -> np.ndarray:
         """
         Generate the TS and combine it to the input time series in the specified domain.
 
         Args:
-            ts (np.ndarray): Input time series data.
+            ts (np.ndarray): Input time series data, either (seq_len, no_variates) or (batch_size, seq_len, no_variates).
             mask_ts (np.ndarray): Optional boolean mask
+            transform (bool): see `combine`.
+            out (np.ndarray | None): see `combine`.
 
         """
 
-        generated_ts = self.generate()
-        return self.combine(ts, generated_ts, mask_ts)
+        if self.pointwise and mask_ts is not None and self.combine_domain == "time":
+            return self.combine_on_support(ts, mask_ts, out)[0]
+
+        generated_ts = self.generate(ts.shape[0] if ts.ndim == 3 else None)
+        return self.combine(ts, generated_ts, mask_ts, transform, out)
     
+    def params(self) -> Dict[str, Any]:
+        """Parameters of the generator, as recorded in the labels of Some."""
+        return {k: v for k, v in vars(self).items() if k != "rng" and not k.startswith("_")}
+
     def __str__(self):
         return f"{self.__class__.__name__}({self.combine_domain}, {self.combine_mode})"
     
@@ -109,5 +403,26 @@ class BaseGenerator(ABC):
         for i in range(ts.shape[1]):
             plt.plot(ts[:, i], label=f'Variate {i}')
         plt.show()
-        
-        
\ No newline at end of file
+
+
+class PointwiseGenerator(BaseGenerator):
+    """
+    Generator of i.i.d. values: subclasses only implement `_fill`. With a mask only the masked points are drawn
+    (see `combine_on_support`).
+    """
+    pointwise = True
+
+    @abstractmethod
+    def _fill(self, values: np.ndarray):
+        """Fill `values` in place with i.i.d. values."""
+
+    def sample(self, shape: tuple[int], dtype: np.dtype | None = None) -> np.ndarray:
+        """Draw an array of any shape of i.i.d. values."""
+        values = np.empty(shape, dtype=self.dtype if dtype is None else dtype)
+        self._fill(values)
+        return values
+
+    def _generate(self, shape: tuple[int, int, int], out: np.ndarray | None = None) -> np.ndarray:
+        noise = self.new_ts(shape, out)
+        self._fill(noise)
+        return noise
@@ -1,4 +1,5 @@
-from .base import BaseGenerator
+from .base import BaseGenerator, SeedLike
+from .intervals import concat_ranges
 import numpy as np
 from typing import Literal
 
@@ -15,6 +16,8 @@ class CostantGenerator(BaseGenerator):
         gen_length=3,
         gen_length_variance=1,
         gen_points:bool = False,
+        seed: SeedLike = None,
+        dtype: np.dtype = np.float64,
     ):
         """
         Initialize the CostantGenerator.
@@ -34,43 +37,89 @@ class CostantGenerator(BaseGenerator):
                 Variance in the number of consecutive points for anomalies.
             gen_points: bool, default=False
                 If true force lenght to be 1 and generate just random points
+            seed: (SeedLike): seed of the random stream, see `BaseGenerator`.
+            dtype: (np.dtype): float type of the generated TS.
 
         """
         if gen_points and gen_length != 1:
             print(f"Warning, gen_points overwrite gen_lenght to 1 (currently: {gen_length})")
             gen_length = 1
         
-        super().__init__(shape, ts, combine_domain, combine_mode)
+        super().__init__(shape, ts, combine_domain, combine_mode, seed, dtype)
         self.gen_fraction = gen_fraction
         self.gen_value = gen_value
         self.gen_length = gen_length
         self.gen_length_variance = gen_length_variance
 
-    def generate(self) -> np.ndarray:
+    def _generate(self, shape: tuple[int, int, int], out: np.ndarray | None = None) -> np.ndarray:
+        return self._generate_runs(shape, out=out)
 
-        ts = self.get_base_ts()
+    def _init_stream(self, shape: tuple[int, int, int]) -> dict:
+        batch_size, _, no_variates = shape
+        return {
+            "carry_len": np.zeros((batch_size, no_variates), dtype=np.int64),
+            "carry_value": np.zeros((batch_size, no_variates)),
+        }
 
-        num_anomalies = int(self.gen_fraction * self.seq_len * self.no_variates)
-        gen_indices = np.random.choice(
-            self.seq_len * self.no_variates, num_anomalies, replace=False
+    def _generate_chunk(self, shape: tuple[int, int, int], state: dict) -> np.ndarray:
+        return self._generate_runs(shape, state)
+
+    def _generate_runs(
+        self, shape: tuple[int, int, int], state: dict | None = None, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Place the runs of constant values.
+
+        Args:
+            shape (tuple[int, int, int]): (batch_size, seq_len, no_variates)
+            state (dict | None): stream state. If given, runs left over by the previous chunk are written first and
+                the runs crossing the end of this chunk are left over for the next one (the last one placed wins).
+            out (np.ndarray | None): optional buffer to write into.
+        """
+
+        ts = self.get_base_ts(shape, out)
+        batch_size, seq_len, no_variates = shape
+
+        if state is not None:
+            carry_len, carry_value = state["carry_len"], state["carry_value"]
+            b, j = np.nonzero(carry_len)
+            self._scatter_runs(ts, b, np.zeros_like(b), j, carry_len[b, j], carry_value[b, j])
+            carry_len -= np.minimum(carry_len, seq_len)
+
+        # Draw all runs at once: start positions, lengths and values
+        num_anomalies = int(self.gen_fraction * seq_len * no_variates)
+        gen_indices = np.concatenate([
+            self.rng.choice(seq_len * no_variates, num_anomalies, replace=False)
+            for _ in range(batch_size)
+        ])
+        b = np.repeat(np.arange(batch_size), num_anomalies)
+        i, j = np.divmod(gen_indices, no_variates)
+
+        gen_len = np.maximum(
+            1,
+            self.rng.normal(self.gen_length, self.gen_length_variance, len(gen_indices)).astype(np.int64),
         )
-        for idx in gen_indices:
-            i = idx // self.no_variates
-            j = idx % self.no_variates
-
-            gen_len = max(
-                1,
-                int(
-                    np.random.normal(self.gen_length, self.gen_length_variance)
-                ),
-            )
-            
-            cur_value = self.gen_value if self.gen_value else np.random.random(1)
-            for k in range(gen_len):
-                if i + k < self.seq_len:
-                    ts[i + k, j] = cur_value
+        cur_value = np.full(len(gen_indices), self.gen_value) if self.gen_value else self.rng.random(len(gen_indices))
+
+        self._scatter_runs(ts, b, i, j, gen_len, cur_value)
+
+        if state is not None:
+            over = i + gen_len > seq_len
+            carry_len[b[over], j[over]] = (i + gen_len - seq_len)[over]
+            carry_value[b[over], j[over]] = cur_value[over]
         return ts
 
+    @staticmethod
+    def _scatter_runs(
+        ts: np.ndarray, b: np.ndarray, i: np.ndarray, j: np.ndarray, lengths: np.ndarray, values: np.ndarray
+    ):
+        """
+        Write the runs ts[b, i:i + length, j] = value, cut at the end of ts. Later runs overwrite earlier ones.
+        """
+        rows, run = concat_ranges(i, lengths)
+        inside = rows < ts.shape[1]
+        run, rows = run[inside], rows[inside]
+        ts[b[run], rows, j[run]] = values[run]
 
 if __name__ == "__main__":
     generator = CostantGenerator(
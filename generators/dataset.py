@@ -0,0 +1,217 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator
+import numpy as np
+from .base import BaseGenerator, SeedLike, make_rng
+from .utils import Some
+
+
+@dataclass
+class Pipeline():
+    """Recipe of a single sample: a base TS, an optional mask and the anomalies applied by Some."""
+    base: BaseGenerator
+    some: Some
+    mask: BaseGenerator = None
+
+    def reseed(self, seed: SeedLike):
+        """Give base, mask and Some independent child streams of `seed`."""
+        base_rng, mask_rng, some_rng = make_rng(seed).spawn(3)
+        self.base.reseed(base_rng)
+        if self.mask is not None:
+            self.mask.reseed(mask_rng)
+        self.some.reseed(some_rng)
+
+    def sample(
+        self, seed: SeedLike = None, out: tuple[np.ndarray, np.ndarray, np.ndarray | None] | None = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+        """
+        Generate a sample.
+
+        Args:
+            seed (int | SeedSequence | np.random.Generator | None): If given, the pipeline is reseeded before generating.
+            out (tuple | None): Optional (ts, raw_ts, mask_ts) buffers the sample is written into, e.g. slices of
+                shared memory. A sparse mask is written densely.
+
+        Returns:
+            tuple: (ts, raw_ts, mask_ts), mask_ts is None if the pipeline has no mask.
+        """
+        if seed is not None:
+            self.reseed(seed)
+        ts_out, raw_out, mask_out = out if out is not None else (None, None, None)
+
+        raw_ts = self.base.generate(out=raw_out)
+        mask_ts = self.mask.generate() if self.mask is not None else None
+        ts = self.some.generate_and_combine(raw_ts, mask_ts, out=ts_out)
+
+        if mask_out is not None:
+            np.copyto(mask_out, mask_ts if isinstance(mask_ts, np.ndarray) else mask_ts.to_dense(mask_out.dtype))
+            mask_ts = mask_out
+        return ts, raw_ts, mask_ts
+
+    def generate_chunks(
+        self, chunk_len: int, n_chunks: int | None = None, batch_size: int | None = None, segment_len: int | None = None
+    ) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray | None]]:
+        """
+        Generate an arbitrarily long sample chunk by chunk, see `BaseGenerator.generate_chunks`.
+
+        Args:
+            segment_len (int | None): Steps after which the anomalies that fire are drawn again, see `Some.init_stream`.
+                If None they are drawn once for the whole stream.
+
+        Yields:
+            tuple: (ts, raw_ts, mask_ts) chunks, mask_ts is None if the pipeline has no mask.
+        """
+        raw_chunks = self.base.generate_chunks(chunk_len, n_chunks, batch_size)
+        mask_chunks = self.mask.generate_chunks(chunk_len, n_chunks, batch_size) if self.mask is not None else None
+        state = self.some.init_stream(segment_len)
+        for raw_ts in raw_chunks:
+            mask_ts = next(mask_chunks) if mask_chunks is not None else None
+            yield self.some.combine_chunk(raw_ts, mask_ts, state), raw_ts, mask_ts
+
+    def output_dtypes(self) -> tuple[np.dtype, np.dtype, np.dtype | None]:
+        """dtypes of (ts, raw_ts, mask_ts)."""
+        return self.base.dtype, self.base.dtype, self.mask.dtype if self.mask is not None else None
+
+
+def sample_seed(seed: int, index: int) -> np.random.SeedSequence:
+    """Deterministic seed of the `index`-th sample of a dataset, independent of how samples are split among workers."""
+    return np.random.SeedSequence(seed, spawn_key=(index,))
+
+
+class SharedBuffers():
+    """
+    (ts, raw_ts, mask_ts) outputs of `build_dataset` in shared memory blocks, that worker processes write into
+    directly and the parent process maps without copies.
+
+    Use it as a context manager: the blocks are released on exit, so copy what must outlive it.
+
+        with SharedBuffers(pipeline, n_samples) as buffers:
+            ts, raw_ts, mask_ts = build_dataset(pipeline, n_samples, out=buffers)
+    """
+
+    def __init__(self, pipeline: Pipeline, n_samples: int):
+        shape = (n_samples, *pipeline.base.shape)
+        self.blocks = {}
+        # name -> (block name, shape, dtype), enough for a worker to map the block
+        self.specs = {}
+        for name, dtype in zip(("ts", "raw_ts", "mask_ts"), pipeline.output_dtypes()):
+            if dtype is None:
+                continue
+            block = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+            self.blocks[name] = block
+            self.specs[name] = (block.name, shape, np.dtype(dtype))
+
+    @property
+    def arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+        """(ts, raw_ts, mask_ts) arrays mapping the blocks, mask_ts is None if the pipeline has no mask."""
+        return tuple(
+            np.ndarray(self.specs[name][1], self.specs[name][2], buffer=self.blocks[name].buf)
+            if name in self.blocks else None
+            for name in ("ts", "raw_ts", "mask_ts")
+        )
+
+    def close(self):
+        """Release the blocks. Arrays returned by `arrays` must not be used (nor referenced) anymore."""
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
+
+    def __enter__(self) -> "SharedBuffers":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_worker_pipeline: Pipeline = None
+_worker_blocks: dict = {}
+
+
+def _init_worker(pipeline: Pipeline, specs: dict):
+    global _worker_pipeline
+    _worker_pipeline = pipeline
+    for name, (block_name, shape, dtype) in specs.items():
+        _worker_blocks[name] = (SharedMemory(block_name), shape, dtype)
+
+
+def _fill_chunk(
+    pipeline: Pipeline, seed: int, start: int, stop: int, ts: np.ndarray, raw_ts: np.ndarray, mask_ts: np.ndarray | None
+):
+    """Generate the samples start:stop straight into their rows of the outputs."""
+    for i in range(start, stop):
+        pipeline.sample(sample_seed(seed, i), out=(ts[i], raw_ts[i], mask_ts[i] if mask_ts is not None else None))
+
+
+def _build_chunk(seed: int, start: int, stop: int):
+    # Views are dropped before returning, so that the blocks can be closed when the worker exits
+    views = {
+        name: np.ndarray(shape, dtype, buffer=block.buf) for name, (block, shape, dtype) in _worker_blocks.items()
+    }
+    _fill_chunk(_worker_pipeline, seed, start, stop, views["ts"], views["raw_ts"], views.get("mask_ts"))
+    del views
+    return start, stop
+
+
+def build_dataset(
+    pipeline: Pipeline,
+    n_samples: int,
+    workers: int | None = None,
+    seed: int = 0,
+    chunk_size: int | None = None,
+    out: SharedBuffers | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """
+    Generate a dataset of `n_samples` samples in a process pool.
+
+    Every sample is generated with its own seed derived from `seed` and its index, so the dataset is the same
+    for any number of workers and chunk size. Workers write the samples into shared memory, nothing is sent
+    back but the bounds of the chunks.
+
+    Args:
+        pipeline (Pipeline): Recipe of the samples, it is sent once to each worker.
+        n_samples (int): Number of samples to generate.
+        workers (int | None): Number of worker processes. None to use all the cores, 0 or 1 to generate in the current process.
+        seed (int): Seed of the dataset.
+        chunk_size (int | None): Number of samples generated by each task. None to split the dataset
+            in about 4 tasks per worker.
+        out (SharedBuffers | None): Optional shared memory outputs, returned without copies. If None, the dataset
+            is generated into temporary blocks and copied to ordinary arrays at the end.
+
+    Returns:
+        tuple: (ts, raw_ts, mask_ts) arrays of shape (n_samples, seq_len, no_variates), mask_ts is None if the pipeline has no mask.
+    """
+    if workers is None:
+        workers = os.cpu_count()
+
+    if chunk_size is None:
+        chunk_size = max(1, -(-n_samples // (max(workers, 1) * 4)))
+
+    bounds = [(start, min(start + chunk_size, n_samples)) for start in range(0, n_samples, chunk_size)]
+
+    if workers <= 1 and out is None:
+        shape = (n_samples, *pipeline.base.shape)
+        outputs = tuple(np.empty(shape, dtype=dtype) if dtype is not None else None for dtype in pipeline.output_dtypes())
+        for start, stop in bounds:
+            _fill_chunk(pipeline, seed, start, stop, *outputs)
+        return outputs
+
+    buffers = out if out is not None else SharedBuffers(pipeline, n_samples)
+    try:
+        if workers <= 1:
+            for start, stop in bounds:
+                _fill_chunk(pipeline, seed, start, stop, *buffers.arrays)
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(pipeline, buffers.specs)) as executor:
+                futures = [executor.submit(_build_chunk, seed, start, stop) for start, stop in bounds]
+                for future in as_completed(futures):
+                    future.result()
+
+        if out is not None:
+            return buffers.arrays
+        return tuple(array.copy() if array is not None else None for array in buffers.arrays)
+    finally:
+        if out is None:
+            buffers.close()
@@ -1,4 +1,4 @@
-from .base import BaseGenerator
+from .base import BaseGenerator, SeedLike
 import numpy as np
 from typing import Literal
 
@@ -15,6 +15,8 @@ class DriftGenerator(BaseGenerator):
         polynomial_degree=2,
         random_drift=False,
         drift_rate_range=(0.005, 0.02),
+        seed: SeedLike = None,
+        dtype: np.dtype = np.float64,
     ):
         """
         Initialize the DriftGenerator.
@@ -34,46 +36,69 @@ class DriftGenerator(BaseGenerator):
                 Whether to randomize drift rate for each variate.
             drift_rate_range : tuple, default=(0.005, 0.02)
                 Range for random drift rate if random_drift is True.
+            seed: (SeedLike): seed of the random stream, see `BaseGenerator`.
+            dtype: (np.dtype): float type of the generated TS.
         """
-        super().__init__(shape, ts, combine_domain, combine_mode)
+        super().__init__(shape, ts, combine_domain, combine_mode, seed, dtype)
         self.drift_type = drift_type
         self.drift_rate = drift_rate
         self.polynomial_degree = polynomial_degree
         self.random_drift = random_drift
         self.drift_rate_range = drift_rate_range
 
-    def generate(self) -> np.ndarray:
-
-        ts = self.get_base_ts()
-        time_points = np.linspace(0, 1, self.seq_len)
-
-        for variate in range(self.no_variates):
-            # Get drift rate for this variate
-            rate = self.drift_rate
-            if self.random_drift:
-                rate = np.random.uniform(*self.drift_rate_range)
-            
-            # Generate drift based on type
-            if self.drift_type == "linear":
-                drift = rate * time_points
-                
-            elif self.drift_type == "exponential":
-                drift = np.exp(rate * time_points) - 1
-                
-            elif self.drift_type == "polynomial":
-                drift = rate * (time_points ** self.polynomial_degree)
-            
-            else:
-                raise ValueError(f"Unknown drift_type: {self.drift_type}")
-            
-            # Apply random direction
-            if np.random.random() < 0.5:
-                drift = -drift
-            
-            ts[:, variate] = drift
-            
-        return ts
+    def _draw_drifts(self, batch_size: int, no_variates: int) -> tuple[np.ndarray, np.ndarray]:
+        """Draw rate and direction of each variate, as (batch_size, 1, no_variates) arrays."""
 
+        # Get drift rate for each variate
+        rate = np.full((batch_size, 1, no_variates), self.drift_rate, dtype=np.float64)
+        if self.random_drift:
+            rate = self.rng.uniform(*self.drift_rate_range, (batch_size, 1, no_variates))
+
+        # Random direction
+        sign = np.where(self.rng.random((batch_size, 1, no_variates)) < 0.5, -1.0, 1.0)
+
+        return rate, sign
+
+    def _drift(
+        self, time_points: np.ndarray, rate: np.ndarray, sign: np.ndarray, out: np.ndarray | None = None
+    ) -> np.ndarray:
+
+        out = self.new_ts(np.broadcast_shapes(time_points.shape, rate.shape), out)
+
+        # Generate drift based on type
+        if self.drift_type == "linear":
+            drift = np.multiply(rate, time_points, out=out)
+
+        elif self.drift_type == "exponential":
+            drift = np.multiply(rate, time_points, out=out)
+            np.exp(drift, out=drift)
+            drift -= 1
+
+        elif self.drift_type == "polynomial":
+            drift = np.multiply(rate, time_points ** self.polynomial_degree, out=out)
+
+        else:
+            raise ValueError(f"Unknown drift_type: {self.drift_type}")
+
+        drift *= sign
+        return drift
+
+    def _generate(self, shape: tuple[int, int, int], out: np.ndarray | None = None) -> np.ndarray:
+
+        batch_size, seq_len, no_variates = shape
+        time_points = np.linspace(0, 1, seq_len)[None, :, None]
+        return self._drift(time_points, *self._draw_drifts(batch_size, no_variates), out=out)
+
+    def _init_stream(self, shape: tuple[int, int, int]) -> dict:
+        rate, sign = self._draw_drifts(shape[0], shape[2])
+        return {"rate": rate, "sign": sign, "step": 0}
+
+    def _generate_chunk(self, shape: tuple[int, int, int], state: dict) -> np.ndarray:
+        # The drift keeps growing past seq_len, which stays the time unit
+        steps = state["step"] + np.arange(shape[1])
+        state["step"] += shape[1]
+        time_points = (steps / max(self.seq_len - 1, 1))[None, :, None]
+        return self._drift(time_points, state["rate"], state["sign"])
 
 if __name__ == "__main__":
     generator = DriftGenerator(
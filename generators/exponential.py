@@ -1,9 +1,9 @@
 import numpy as np
-from .base import BaseGenerator
+from .base import PointwiseGenerator, SeedLike
 from typing import Literal
 
 
-class ExponentialGenerator(BaseGenerator):
+class ExponentialGenerator(PointwiseGenerator):
     def __init__(
         self,
         shape: tuple[int] = None,
@@ -11,6 +11,8 @@ class ExponentialGenerator(BaseGenerator):
         combine_domain: Literal["time", "frequency"] = None,
         combine_mode: Literal["add", "mul"] | None = None,
         scale=1.0,
+        seed: SeedLike = None,
+        dtype: np.dtype = np.float64,
     ):
         """
         Initialize the ExponentialGenerator.
@@ -22,15 +24,15 @@ class ExponentialGenerator(BaseGenerator):
             combine_mode (str): Mode in which the combine operation happens when `apply` method is called ('add' or 'mul').
             scale : float, default=1.0
                 Scale parameter (1/lambda) of the exponential distribution.
+            seed: (SeedLike): seed of the random stream, see `BaseGenerator`.
+            dtype: (np.dtype): float type of the generated TS.
         """
-        super().__init__(shape, ts, combine_domain, combine_mode)
+        super().__init__(shape, ts, combine_domain, combine_mode, seed, dtype)
         self.scale = scale
 
-    def generate(self) -> np.ndarray:
-
-        noise = np.random.exponential(self.scale, self.shape)
-
-        return noise
+    def _fill(self, values: np.ndarray):
+        self.rng.standard_exponential(dtype=values.dtype, out=values)
+        values *= self.scale
 
 
 if __name__ == "__main__":
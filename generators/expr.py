@@ -0,0 +1,261 @@
+"""
+Lazy expressions of generators.
+
+Generators compose through `+` and `*` with other generators, expressions, arrays and numbers, e.g.
+`base + mask * NormalGenerator(...)`. Nothing is generated until `evaluate` is called, then:
+- every generator is run once per evaluation, wherever it appears (e.g. a mask shared by many terms);
+- elementwise operations are done in place into buffers that are recycled as soon as they are consumed;
+- frequency domain generators are combined into the spectrum of their operand, and consecutive frequency
+  domain terms share a single pair of transforms.
+
+A frequency domain generator is combined with the operator of its combine_mode ('add' adds offsets to the
+frequency bins, 'mul' scales them); multiplying an 'add' one by anything else masks it, as the `mask_ts` of `combine`.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Literal
+import numpy as np
+from .base import BaseGenerator, to_frequency, to_time
+
+
+Kind = Literal["time", "spectrum", "bins"]
+
+
+@dataclass
+class _Value():
+    """Intermediate result of an evaluation."""
+    array: np.ndarray
+    kind: Kind = "time"
+    # Combine mode of "bins" values, seq_len of "spectrum" values
+    mode: str | None = None
+    seq_len: int | None = None
+    # Whether the array belongs to the evaluation and can be overwritten once consumed
+    owned: bool = False
+
+
+class _Pool():
+    """Buffers of an evaluation, recycled by shape and dtype."""
+
+    def __init__(self):
+        self._free = {}
+
+    def get(self, shape: tuple[int], dtype: np.dtype) -> np.ndarray:
+        free = self._free.get((shape, np.dtype(dtype)))
+        return free.pop() if free else np.empty(shape, dtype=dtype)
+
+    def release(self, value: _Value):
+        if value.owned:
+            self._free.setdefault((value.array.shape, value.array.dtype), []).append(value.array)
+
+
+class Expr(ABC):
+    """Node of a lazy expression of generators."""
+
+    # Let NumPy defer `array + expr` and `array * expr` to the expression
+    __array_ufunc__ = None
+
+    def __add__(self, other):
+        return BinOp("add", self, as_expr(other))
+
+    def __radd__(self, other):
+        return BinOp("add", as_expr(other), self)
+
+    def __mul__(self, other):
+        return BinOp("mul", self, as_expr(other))
+
+    def __rmul__(self, other):
+        return BinOp("mul", as_expr(other), self)
+
+    @property
+    @abstractmethod
+    def key(self) -> tuple:
+        """Structural key of the node: nodes with the same key evaluate to the same value."""
+
+    def children(self) -> tuple["Expr", ...]:
+        return ()
+
+    @abstractmethod
+    def _evaluate(self, evaluation: "_Evaluation") -> _Value:
+        pass
+
+    def evaluate(self, batch_size: int | None = None, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Evaluate the expression.
+
+        Args:
+            batch_size (int | None): If given, every generator generates a batch of TS.
+            out (np.ndarray | None): Optional output buffer with the shape of the result.
+
+        Returns:
+            np.ndarray: the resulting TS.
+        """
+        evaluation = _Evaluation(self, batch_size)
+        value = evaluation.value(self)
+        if value.kind == "spectrum":
+            value = _Value(to_time(value.array, value.seq_len), owned=True)
+
+        if out is not None:
+            np.copyto(out, value.array)
+            return out
+        return value.array if value.owned else value.array.copy()
+
+
+def as_expr(value) -> Expr:
+    """Wrap generators, arrays and numbers as expression nodes."""
+    if isinstance(value, Expr):
+        return value
+    if isinstance(value, BaseGenerator):
+        return Term(value)
+    return Constant(value)
+
+
+class Term(Expr):
+    """A generator, run once per evaluation."""
+
+    def __init__(self, generator: BaseGenerator):
+        self.generator = generator
+
+    @property
+    def key(self) -> tuple:
+        return ("term", id(self.generator))
+
+    def _evaluate(self, evaluation: "_Evaluation") -> _Value:
+        generator = self.generator
+        shape = generator.shape if evaluation.batch_size is None else generator.batch_shape(evaluation.batch_size)
+        array = generator.generate(evaluation.batch_size, out=evaluation.pool.get(shape, generator.dtype))
+        if generator.combine_domain == "frequency":
+            return _Value(array, "bins", mode=generator.combine_mode, owned=True)
+        return _Value(array, owned=True)
+
+    def __repr__(self):
+        return self.generator.__class__.__name__
+
+
+class Constant(Expr):
+    """An array or a number, never overwritten."""
+
+    def __init__(self, value):
+        self.value = value
+
+    @property
+    def key(self) -> tuple:
+        return ("constant", id(self.value))
+
+    def _evaluate(self, evaluation: "_Evaluation") -> _Value:
+        return _Value(np.asarray(self.value))
+
+    def __repr__(self):
+        return repr(self.value) if np.ndim(self.value) == 0 else f"array{np.shape(self.value)}"
+
+
+class BinOp(Expr):
+    """Elementwise sum or product of two nodes."""
+
+    def __init__(self, op: Literal["add", "mul"], left: Expr, right: Expr):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    @property
+    def key(self) -> tuple:
+        return (self.op, self.left.key, self.right.key)
+
+    def children(self) -> tuple[Expr, ...]:
+        return (self.left, self.right)
+
+    def _evaluate(self, evaluation: "_Evaluation") -> _Value:
+        left = evaluation.value(self.left)
+        right = evaluation.value(self.right)
+        ufunc = np.add if self.op == "add" else np.multiply
+
+        if (left.kind == "bins") != (right.kind == "bins"):
+            signal, bins = (right, left) if left.kind == "bins" else (left, right)
+            if self.op == bins.mode:
+                return evaluation.combine_bins(ufunc, signal, bins)
+            if bins.mode == "add" and self.op == "mul":
+                # Masked frequency domain generator, still to be combined
+                return evaluation.elementwise(ufunc, bins, evaluation.in_time(signal), "bins", bins.mode)
+            raise ValueError(f"A frequency domain generator in '{bins.mode}' mode can't be combined by '{self.op}'.")
+
+        if left.kind == "bins":
+            if self.op != left.mode or self.op != right.mode:
+                raise ValueError("Frequency domain generators can only be combined with others of the same mode.")
+            return evaluation.elementwise(ufunc, left, right, "bins", left.mode)
+
+        return evaluation.elementwise(ufunc, evaluation.in_time(left), evaluation.in_time(right))
+
+    def __repr__(self):
+        return f"({self.left!r} {'+' if self.op == 'add' else '*'} {self.right!r})"
+
+
+class _Evaluation():
+    """State of a single evaluation: values of the shared nodes and recycled buffers."""
+
+    def __init__(self, root: Expr, batch_size: int | None):
+        self.batch_size = batch_size
+        self.pool = _Pool()
+        self.values = {}
+        # Number of parents still to consume each node, shared nodes are counted once per parent
+        self.uses = {}
+        self._count(root, set())
+
+    def _count(self, node: Expr, seen: set):
+        if node.key in seen:
+            return
+        seen.add(node.key)
+        for child in node.children():
+            self.uses[child.key] = self.uses.get(child.key, 0) + 1
+            self._count(child, seen)
+
+    def value(self, node: Expr) -> _Value:
+        """Value of a node, evaluated on first use. A shared node is owned only by its last consumer."""
+        key = node.key
+        if key not in self.values:
+            self.values[key] = node._evaluate(self)
+        value = self.values[key]
+
+        self.uses[key] = self.uses.get(key, 1) - 1
+        if self.uses[key] > 0:
+            return _Value(value.array, value.kind, value.mode, value.seq_len, owned=False)
+        del self.values[key]
+        return value
+
+    def in_time(self, value: _Value) -> _Value:
+        if value.kind != "spectrum":
+            return value
+        array = to_time(value.array, value.seq_len)
+        self.pool.release(value)
+        return _Value(array, owned=True)
+
+    def elementwise(
+        self, ufunc: np.ufunc, left: _Value, right: _Value, kind: Kind = "time", mode: str | None = None
+    ) -> _Value:
+        """Apply `ufunc`, in place into an operand that is owned and has the shape and dtype of the result."""
+        shape = np.broadcast_shapes(left.array.shape, right.array.shape)
+        dtype = np.result_type(left.array, right.array)
+        out = next(
+            (value for value in (left, right) if value.owned and value.array.shape == shape and value.array.dtype == dtype),
+            None,
+        )
+        array = out.array if out is not None else self.pool.get(shape, dtype)
+        ufunc(left.array, right.array, out=array)
+        for value in (left, right):
+            if value is not out:
+                self.pool.release(value)
+        return _Value(array, kind, mode, left.seq_len or right.seq_len, owned=True)
+
+    def combine_bins(self, ufunc: np.ufunc, signal: _Value, bins: _Value) -> _Value:
+        """Combine the first seq_len // 2 + 1 steps of a frequency domain generator into the spectrum of `signal`."""
+        seq_len = bins.array.shape[-2]
+        if signal.kind == "time":
+            assert signal.array.shape[-2] == seq_len
+            spectrum = _Value(to_frequency(signal.array), "spectrum", seq_len=seq_len, owned=True)
+            self.pool.release(signal)
+        else:
+            spectrum = signal
+
+        no_freqs = spectrum.array.shape[-2]
+        result = self.elementwise(ufunc, spectrum, _Value(bins.array[..., :no_freqs, :]), "spectrum")
+        result.seq_len = seq_len
+        self.pool.release(bins)
+        return result
@@ -1,9 +1,9 @@
 import numpy as np
-from .base import BaseGenerator
+from .base import PointwiseGenerator, SeedLike
 from typing import Literal
 
 
-class GammaGenerator(BaseGenerator):
+class GammaGenerator(PointwiseGenerator):
     def __init__(
         self,
         shape: tuple[int] = None,
@@ -12,6 +12,8 @@ class GammaGenerator(BaseGenerator):
         combine_mode: Literal["add", "mul"] | None = None,
         shape_param=2.0,
         scale=1.0,
+        seed: SeedLike = None,
+        dtype: np.dtype = np.float64,
     ):
         """
         Initialize the GammaGenerator.
@@ -25,16 +27,16 @@ class GammaGenerator(BaseGenerator):
                 Shape parameter (k) of the gamma distribution.
             scale : float, default=1.0
                 Scale parameter (theta) of the gamma distribution.
+            seed: (SeedLike): seed of the random stream, see `BaseGenerator`.
+            dtype: (np.dtype): float type of the generated TS.
         """
-        super().__init__(shape, ts, combine_domain, combine_mode)
+        super().__init__(shape, ts, combine_domain, combine_mode, seed, dtype)
         self.shape_param = shape_param
         self.scale = scale
 
-    def generate(self) -> np.ndarray:
-
-        noise = np.random.gamma(self.shape_param, self.scale, self.shape)
-
-        return noise
+    def _fill(self, values: np.ndarray):
+        self.rng.standard_gamma(self.shape_param, dtype=values.dtype, out=values)
+        values *= self.scale
 
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import time
+import tracemalloc
+from typing import Iterator
+
+
+@dataclass
+class ApplyEvent():
+    """A Maybe entry applied by Some."""
+    index: int
+    name: str
+    # Number of samples of the batch the entry fired for, None for a single TS
+    samples: int | None
+    generate_seconds: float
+    combine_seconds: float
+    # Size of the values generated for the entry
+    generated_bytes: int
+    # Peak of the memory allocated while generating and combining, None unless memory is traced
+    allocated_bytes: int | None = None
+
+
+@dataclass
+class CallEvent():
+    """A call of `Some.generate_and_combine`."""
+    seconds: float
+    applied: int
+    skipped: int
+    batch_size: int | None
+
+
+class Hook():
+    """
+    Receiver of the events of Some, passed as `Some(..., hooks=[...])`. Every method does nothing by default.
+
+    Attributes:
+        trace_memory (bool): If True, Some traces the memory allocated by every applied entry with tracemalloc,
+            which slows generation down.
+    """
+    trace_memory = False
+
+    def skip(self, index: int, elem):
+        """A Maybe entry didn't fire (for any sample of the batch)."""
+
+    def apply(self, event: ApplyEvent, elem):
+        """A Maybe entry was applied."""
+
+    def call(self, event: CallEvent):
+        """A call of `generate_and_combine` ended."""
+
+
+class PrintHook(Hook):
+    """Print every skipped and applied entry, as Some used to."""
+
+    def skip(self, index: int, elem):
+        print(f"Skipped {elem} (index: {index}).")
+
+    def apply(self, event: ApplyEvent, elem):
+        print(f"Applied {elem} (index: {event.index}).")
+
+
+@dataclass
+class GeneratorProfile():
+    """Counters of a Maybe entry."""
+    name: str
+    applied: int = 0
+    skipped: int = 0
+    samples: int = 0
+    generate_seconds: float = 0.0
+    combine_seconds: float = 0.0
+    generated_bytes: int = 0
+    peak_allocated_bytes: int | None = None
+
+    @property
+    def seconds(self) -> float:
+        return self.generate_seconds + self.combine_seconds
+
+
+@dataclass
+class ProfileHook(Hook):
+    """
+    Aggregate counters of every Maybe entry over many calls.
+
+    Attributes:
+        trace_memory (bool): Also trace the peak memory allocated by every entry (slow).
+    """
+    trace_memory: bool = False
+    calls: int = 0
+    seconds: float = 0.0
+    generators: dict[int, GeneratorProfile] = field(default_factory=dict)
+
+    def _profile(self, index: int, elem) -> GeneratorProfile:
+        if index not in self.generators:
+            self.generators[index] = GeneratorProfile(elem.generator.__class__.__name__)
+        return self.generators[index]
+
+    def skip(self, index: int, elem):
+        self._profile(index, elem).skipped += 1
+
+    def apply(self, event: ApplyEvent, elem):
+        profile = self._profile(event.index, elem)
+        profile.applied += 1
+        profile.samples += 1 if event.samples is None else event.samples
+        profile.generate_seconds += event.generate_seconds
+        profile.combine_seconds += event.combine_seconds
+        profile.generated_bytes += event.generated_bytes
+        if event.allocated_bytes is not None:
+            profile.peak_allocated_bytes = max(profile.peak_allocated_bytes or 0, event.allocated_bytes)
+
+    def call(self, event: CallEvent):
+        self.calls += 1
+        self.seconds += event.seconds
+
+    def reset(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.generators = {}
+
+    def summary(self) -> dict:
+        """Counters as plain types, e.g. to be dumped as JSON. Entries are sorted by total time."""
+        generators = sorted(self.generators.items(), key=lambda item: item[1].seconds, reverse=True)
+        return {
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "generators": [
+                {"index": index, **vars(profile), "seconds": profile.seconds} for index, profile in generators
+            ],
+        }
+
+    def __str__(self):
+        lines = [f"{self.calls} calls, {self.seconds:.3f} s"]
+        for generator in self.summary()["generators"]:
+            share = generator["seconds"] / self.seconds if self.seconds else 0.0
+            lines.append(
+                f"{generator['name']:>22} (index: {generator['index']}) {share:6.1%}  "
+                f"generate {generator['generate_seconds']:8.3f} s  combine {generator['combine_seconds']:8.3f} s  "
+                f"applied {generator['applied']:>6}  skipped {generator['skipped']:>6}  "
+                f"{generator['generated_bytes'] / 2**20:10.1f} MiB generated"
+                + (
+                    f"  {generator['peak_allocated_bytes'] / 2**20:8.1f} MiB peak"
+                    if generator["peak_allocated_bytes"] is not None else ""
+                )
+            )
+        return "\n".join(lines)
+
+
+class Stopwatch():
+    """Time, and optionally peak allocated memory, of the generate and combine phases of an applied entry."""
+
+    def __init__(self, trace_memory: bool = False):
+        self.seconds = {"generate": 0.0, "combine": 0.0}
+        self.generated_bytes = 0
+        self.allocated_bytes = 0 if trace_memory else None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        tracing = self.allocated_bytes is not None
+        if tracing:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            if tracing:
+                self.allocated_bytes = max(self.allocated_bytes, tracemalloc.get_traced_memory()[1] - before)
+                if started:
+                    tracemalloc.stop()
+
+
+class CallReport():
+    """Events of a call of Some sent to its hooks: skipped and applied entries, then the end of the call."""
+
+    def __init__(self, hooks: list[Hook], batch_size: int | None):
+        self.hooks = hooks
+        self.batch_size = batch_size
+        self.trace_memory = any(hook.trace_memory for hook in hooks)
+        self.applied = 0
+        self.skipped = 0
+        self.start = time.perf_counter()
+
+    def stopwatch(self) -> Stopwatch | None:
+        """Stopwatch of an applied entry, None if nobody listens."""
+        return Stopwatch(self.trace_memory) if self.hooks else None
+
+    def skip(self, index: int, elem):
+        self.skipped += 1
+        for hook in self.hooks:
+            hook.skip(index, elem)
+
+    def apply(self, index: int, elem, samples: int | None, stopwatch: Stopwatch | None):
+        self.applied += 1
+        if stopwatch is None:
+            return
+        event = ApplyEvent(
+            index,
+            elem.generator.__class__.__name__,
+            samples,
+            stopwatch.seconds["generate"],
+            stopwatch.seconds["combine"],
+            stopwatch.generated_bytes,
+            stopwatch.allocated_bytes,
+        )
+        for hook in self.hooks:
+            hook.apply(event, elem)
+
+    def end(self):
+        if not self.hooks:
+            return
+        event = CallEvent(time.perf_counter() - self.start, self.applied, self.skipped, self.batch_size)
+        for hook in self.hooks:
+            hook.call(event)
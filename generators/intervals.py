@@ -0,0 +1,145 @@
+from dataclasses import dataclass
+import numpy as np
+from .labels import spans_from_flags
+
+
+def concat_ranges(starts: np.ndarray, lengths: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenation of the ranges [start, start + length).
+
+    Returns:
+        tuple: (positions, range index of each position)
+    """
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    offsets = np.arange(len(owner)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return starts[owner] + offsets, owner
+
+
+@dataclass
+class IntervalMask():
+    """
+    Sparse mask made of non overlapping spans, understood by `BaseGenerator.combine` in place of a dense mask.
+
+    Attributes:
+        shape (tuple[int]): shape of the equivalent dense mask, (seq_len, no_variates) or (batch_size, seq_len, no_variates).
+        spans (np.ndarray): int array with a row per span, columns (start, end, variate) or (batch, start, end, variate)
+            for a batched mask, as in the labels of Some. `end` is exclusive.
+        weights (np.ndarray | None): optional value of every masked point, in the order of `indices`
+            (e.g. the sigmoid edges of a SigmoidMaskGenerator mask). None means 1 everywhere.
+    """
+    shape: tuple[int]
+    spans: np.ndarray
+    weights: np.ndarray | None = None
+
+    def __post_init__(self):
+        self.shape = tuple(self.shape)
+        self.spans = np.asarray(self.spans, dtype=np.int64).reshape(-1, len(self.shape) + 1)
+        self._positions = None
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        """Number of masked points."""
+        return int((self.spans[:, -2] - self.spans[:, -3]).sum())
+
+    @property
+    def density(self) -> float:
+        return self.size / np.prod(self.shape)
+
+    def _expand(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._positions is None:
+            starts, ends = self.spans[:, -3], self.spans[:, -2]
+            self._positions = concat_ranges(starts, ends - starts)
+        return self._positions
+
+    def indices(self, ndim: int | None = None) -> tuple:
+        """
+        Index of all the masked points, in the order of `weights`.
+
+        Args:
+            ndim (int | None): number of dimensions of the indexed array. A (seq_len, no_variates) mask indexes
+                every TS of a batch if ndim is 3.
+        """
+        time, span = self._expand()
+        variate = self.spans[span, -1]
+        if self.ndim == 3:
+            return self.spans[span, 0], time, variate
+        if ndim == 3:
+            return slice(None), time, variate
+        return time, variate
+
+    def values(self, dtype: np.dtype = np.float64) -> np.ndarray:
+        """Mask value of every masked point, in the order of `indices`."""
+        if self.weights is None:
+            return np.ones(self.size, dtype=dtype)
+        return self.weights.astype(dtype, copy=False)
+
+    def __getitem__(self, batch: int) -> "IntervalMask":
+        """Mask of the `batch`-th TS of a batched mask, like indexing the first axis of a dense one."""
+        assert self.ndim == 3, "only batched masks can be indexed"
+        selected = self.spans[:, 0] == batch
+        weights = None
+        if self.weights is not None:
+            _, span = self._expand()
+            weights = self.weights[selected[span]]
+        return IntervalMask(self.shape[1:], self.spans[selected, 1:], weights)
+
+    def take(self, batches: np.ndarray) -> "IntervalMask":
+        """Masks of some TS of a batched mask, in the order of `batches`, like `mask[batches]` on a dense one."""
+        assert self.ndim == 3, "only batched masks can be indexed"
+        position = np.full(self.shape[0], -1)
+        position[batches] = np.arange(len(batches))
+        selected = position[self.spans[:, 0]] >= 0
+        spans = self.spans[selected]
+        spans[:, 0] = position[spans[:, 0]]
+        weights = None
+        if self.weights is not None:
+            _, span = self._expand()
+            weights = self.weights[selected[span]]
+        return IntervalMask((len(batches), *self.shape[1:]), spans, weights)
+
+    def window(self, start: int, length: int) -> "IntervalMask":
+        """
+        Steps [start, start + length) of the mask repeated along time, like
+        `np.take(mask, np.arange(start, start + length) % seq_len, axis=-2)` on a dense one.
+        """
+        seq_len = self.shape[-2]
+        time, span = self._expand()
+        spans, weights = [], []
+        offset = 0
+        # One piece per period of the mask the window goes through
+        for period in range(start - start % seq_len, start + length, seq_len):
+            low = max(start, period) - period
+            high = min(start + length, period + seq_len) - period
+            starts = np.maximum(self.spans[:, -3], low)
+            ends = np.minimum(self.spans[:, -2], high)
+            kept = starts < ends
+            piece = self.spans[kept]
+            piece[:, -3] = starts[kept] - low + offset
+            piece[:, -2] = ends[kept] - low + offset
+            spans.append(piece)
+            if self.weights is not None:
+                weights.append(self.weights[kept[span] & (time >= low) & (time < high)])
+            offset += high - low
+
+        shape = (*self.shape[:-2], length, self.shape[-1])
+        spans = np.concatenate(spans) if spans else self.spans[:0]
+        return IntervalMask(shape, spans, np.concatenate(weights) if self.weights is not None and weights else None)
+
+    def to_dense(self, dtype: np.dtype | None = None) -> np.ndarray:
+        if dtype is None:
+            dtype = np.bool_ if self.weights is None else self.weights.dtype
+        dense = np.zeros(self.shape, dtype=dtype)
+        dense[self.indices()] = self.values(dtype)
+        return dense
+
+    @classmethod
+    def from_dense(cls, mask: np.ndarray) -> "IntervalMask":
+        """Interval mask of the non zero points of a dense mask, keeping their values unless it is boolean."""
+        interval_mask = cls(mask.shape, spans_from_flags(mask != 0))
+        if mask.dtype != np.bool_:
+            interval_mask.weights = mask[interval_mask.indices()]
+        return interval_mask
@@ -0,0 +1,90 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict
+import numpy as np
+
+
+def spans_from_flags(flags: np.ndarray) -> np.ndarray:
+    """
+    Runs of True values of a boolean TS.
+
+    Args:
+        flags (np.ndarray): (seq_len, no_variates) or (batch_size, seq_len, no_variates) boolean array.
+
+    Returns:
+        np.ndarray: int array with a row per run, columns (start, end, variate) or (batch, start, end, variate)
+            for batched flags. `end` is exclusive.
+    """
+    padding = [(0, 0)] * flags.ndim
+    padding[-2] = (1, 1)
+    edges = np.diff(np.pad(flags, padding).astype(np.int8), axis=-2)
+
+    # Sorting by (batch, variate, time) pairs each start with its end
+    starts = np.argwhere(np.moveaxis(edges == 1, -1, -2))
+    ends = np.argwhere(np.moveaxis(edges == -1, -1, -2))
+    return np.concatenate([starts[:, :-2], starts[:, -1:], ends[:, -1:], starts[:, -2:-1]], axis=1)
+
+
+def spans_from_points(points: tuple[np.ndarray, ...]) -> np.ndarray:
+    """
+    Runs of consecutive steps among some points of a TS, as `spans_from_flags` but from the points themselves:
+    the cost follows the number of points, not the size of the TS.
+
+    Args:
+        points (tuple[np.ndarray, ...]): ((batch,) time, variate) index arrays of distinct points, in any order.
+
+    Returns:
+        np.ndarray: spans in the layout of `spans_from_flags`, in the same order.
+    """
+    *batch, time, variate = points
+    order = np.lexsort((time, variate, *batch))
+    keys = [key[order] for key in (*batch, variate)]
+    time = time[order]
+
+    # A run starts at a gap in time or at a new (batch, variate)
+    starts = np.ones(len(time), dtype=np.bool_)
+    starts[1:] = time[1:] != time[:-1] + 1
+    for key in keys:
+        starts[1:] |= key[1:] != key[:-1]
+    first = np.flatnonzero(starts)
+    lengths = np.diff(first, append=len(time))
+    return np.stack(
+        [*(key[first] for key in keys[:-1]), time[first], time[first] + lengths, keys[-1][first]], axis=1
+    ).astype(np.int64)
+
+
+def merge_spans(spans: np.ndarray) -> np.ndarray:
+    """Non overlapping spans sorted as by `spans_from_flags`, with the spans touching each other merged."""
+    spans = spans[np.lexsort((spans[:, -3], spans[:, -1], *spans.T[:-3]))]
+    starts = np.ones(len(spans), dtype=np.bool_)
+    starts[1:] = spans[1:, -3] != spans[:-1, -2]
+    for column in [*range(spans.shape[1] - 3), -1]:
+        starts[1:] |= spans[1:, column] != spans[:-1, column]
+    first = np.flatnonzero(starts)
+    merged = spans[first]
+    last = np.append(first[1:], len(spans))[:len(first)] - 1
+    merged[:, -2] = spans[last, -2]
+    return merged
+
+
+@dataclass
+class AppliedGenerator():
+    """Provenance of a generator applied by Some."""
+    index: int
+    name: str
+    params: Dict[str, Any]
+    spans: np.ndarray
+
+    def __str__(self):
+        return f"{self.name} (index: {self.index}, spans: {len(self.spans)})"
+
+
+@dataclass
+class Labels():
+    """Ground truth of a TS generated by Some."""
+    flags: np.ndarray
+    applied: list[AppliedGenerator] = field(default_factory=list)
+
+    @property
+    def spans(self) -> np.ndarray:
+        """Runs of anomalous points, see `spans_from_flags`."""
+        return spans_from_flags(self.flags)
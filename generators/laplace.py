@@ -1,9 +1,9 @@
 import numpy as np
-from .base import BaseGenerator
+from .base import PointwiseGenerator, SeedLike
 from typing import Literal
 
 
-class LaplaceGenerator(BaseGenerator):
+class LaplaceGenerator(PointwiseGenerator):
     def __init__(
         self,
         shape: tuple[int] = None,
@@ -12,6 +12,8 @@ class LaplaceGenerator(BaseGenerator):
         combine_mode: Literal["add", "mul"] | None = None,
         loc=0.0,
         scale=1.0,
+        seed: SeedLike = None,
+        dtype: np.dtype = np.float64,
     ):
         """
         Initialize the LaplaceGenerator (Laplace/double exponential distribution).
@@ -25,16 +27,19 @@ class LaplaceGenerator(BaseGenerator):
                 Location parameter (mean) of the Laplace distribution.
             scale : float, default=1.0
                 Scale parameter (diversity) of the Laplace distribution.
+            seed: (SeedLike): seed of the random stream, see `BaseGenerator`.
+            dtype: (np.dtype): float type of the generated TS.
         """
-        super().__init__(shape, ts, combine_domain, combine_mode)
+        super().__init__(shape, ts, combine_domain, combine_mode, seed, dtype)
         self.loc = loc
         self.scale = scale
 
-    def generate(self) -> np.ndarray:
-
-        noise = np.random.laplace(self.loc, self.scale, self.shape)
-
-        return noise
+    def _fill(self, values: np.ndarray):
+        # Laplace(loc, scale) = loc + scale * (exponential with a random sign)
+        self.rng.standard_exponential(dtype=values.dtype, out=values)
+        np.negative(values, out=values, where=self.rng.integers(0, 2, values.shape, dtype=np.bool_))
+        values *= self.scale
+        values += self.loc
 
 
 if __name__ == "__main__":
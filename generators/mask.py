@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Literal
 import numpy as np
-from .base import BaseGenerator
+from .base import BaseGenerator, SeedLike
+from .intervals import IntervalMask
 
 
 class MaskGenerator(BaseGenerator):
@@ -15,6 +16,8 @@ class MaskGenerator(BaseGenerator):
         intra_variates_probability=0.5,
         cluster_size=50,
         cluster_variance=10,
+        sparse: bool = False,
+        seed: SeedLike = None,
     ):
         """
         Initialize the MaskGenerator.
@@ -28,57 +31,123 @@ class MaskGenerator(BaseGenerator):
             intra_variates_probability (float): Probability of masking within variates.
             cluster_size (int): Average size of mask clusters (consecutive True values). 1 means no clustering.
             cluster_variance (int): Variance in cluster size. 0 means fixed cluster size.
+            sparse (bool): Generate IntervalMask objects (spans of True values) instead of dense boolean arrays.
+            seed: (SeedLike): seed of the random stream, see `BaseGenerator`.
         """
 
-        super().__init__(shape, ts, combine_domain, combine_mode)
+        super().__init__(shape, ts, combine_domain, combine_mode, seed, np.bool_)
         self.inter_variates_probability = inter_variates_probability
         self.intra_variates_probability = intra_variates_probability
         self.cluster_size = cluster_size
         self.cluster_variance = cluster_variance
+        self.sparse = sparse
 
-    def generate(self) -> np.ndarray:
+    def _draw_active_variates(self, batch_size: int, no_variates: int) -> np.ndarray:
+        v_mask = self.rng.random((batch_size, no_variates))
 
-        mask = np.zeros(self.shape, dtype=np.bool_)
-        v_mask = np.random.rand(self.no_variates)
-        
         # Determine which variates are active based on inter_variates_probability
-        active_variates = v_mask < self.inter_variates_probability
-        
-        for j in range(self.no_variates):
-            if not active_variates[j]:
-                continue
-                
-            # Calculate number of True values based on intra_variates_probability
-            num_true = int(self.seq_len * self.intra_variates_probability)
-            
-            if self.cluster_size <= 1:
-                # No clustering - original random behavior
-                true_indices = np.random.choice(self.seq_len, num_true, replace=False)
-                mask[true_indices, j] = True
-            else:
-                # Clustering mode - create clusters of True values
-                i = 0
-                remaining_true = num_true
-                
-                while remaining_true > 0 and i < self.seq_len:
-                    # Randomly decide if this position starts a cluster
-                    if np.random.rand() < (remaining_true / (self.seq_len - i)):
-                        # Determine cluster size
-                        current_cluster_size = max(
-                            1,
-                            int(np.random.normal(self.cluster_size, self.cluster_variance))
-                        )
-                        current_cluster_size = min(current_cluster_size, remaining_true, self.seq_len - i)
-                        
-                        # Apply cluster
-                        mask[i:i + current_cluster_size, j] = True
-                        remaining_true -= current_cluster_size
-                        i += current_cluster_size
-                    else:
-                        i += 1
-            
-        return mask
+        return v_mask < self.inter_variates_probability
 
+    def _generate(self, shape: tuple[int, int, int], out: np.ndarray | None = None) -> np.ndarray:
+        active_variates = self._draw_active_variates(shape[0], shape[2])
+        return self._generate_clusters(shape, active_variates)
+
+    def _init_stream(self, shape: tuple[int, int, int]) -> dict:
+        # Active variates are drawn once for the whole stream
+        return {
+            "active_variates": self._draw_active_variates(shape[0], shape[2]),
+            "carry": np.zeros((shape[0], shape[2]), dtype=np.int64),
+        }
+
+    def _generate_chunk(self, shape: tuple[int, int, int], state: dict) -> np.ndarray:
+        return self._generate_clusters(shape, state["active_variates"], state["carry"])
+
+    def _generate_clusters(
+        self, shape: tuple[int, int, int], active_variates: np.ndarray, carry: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Fill the active variates with intra_variates_probability * seq_len True values.
+
+        Returns:
+            np.ndarray | IntervalMask: dense boolean mask, or its spans if the generator is sparse.
+
+        Args:
+            shape (tuple[int, int, int]): (batch_size, seq_len, no_variates)
+            active_variates (np.ndarray): (batch_size, no_variates) boolean array of the variates to fill.
+            carry (np.ndarray | None): stream state, updated in place. Number of True values the previous chunk
+                left over at the start of this chunk for each variate. If given, clusters are not cut at the end
+                of the chunk: what exceeds it is carried over to the next one.
+        """
+
+        batch_size, seq_len, no_variates = shape
+
+        # Calculate number of True values based on intra_variates_probability
+        num_true = int(seq_len * self.intra_variates_probability)
+
+        # Work on the active (batch, variate) columns all at once
+        b, j = np.nonzero(active_variates)
+        if len(b) == 0:
+            mask = IntervalMask(shape, [])
+            return mask if self.sparse else mask.to_dense()
+
+        if self.cluster_size <= 1:
+            # No clustering - num_true random positions per column
+            mask = np.zeros(shape, dtype=np.bool_)
+            if num_true > 0:
+                keys = self.rng.random((len(b), seq_len))
+                true_indices = np.argpartition(keys, num_true - 1, axis=1)[:, :num_true]
+                mask[b[:, None], true_indices, j[:, None]] = True
+            return IntervalMask.from_dense(mask) if self.sparse else mask
+
+        # Clustering mode - the cluster left over by the previous chunk comes first
+        lead = np.zeros(len(b), dtype=np.int64)
+        if carry is not None:
+            lead = np.minimum(carry[b, j], seq_len)
+            carry[b, j] -= lead
+        budget = np.maximum(num_true - lead, 0)
+
+        # Draw enough cluster sizes to cover the budget of every column
+        draws = max(1, int(np.ceil(budget.max() / self.cluster_size * 1.25)))
+        sizes = self._draw_cluster_sizes((len(b), draws))
+        while (sizes.sum(axis=1) < budget).any():
+            sizes = np.concatenate([sizes, self._draw_cluster_sizes((len(b), draws))], axis=1)
+
+        # Keep the clusters that fit the budget, the last one is cut to match it exactly
+        offsets = np.cumsum(sizes, axis=1) - sizes
+        kept = np.clip(budget[:, None] - offsets, 0, sizes)
+        n_clusters = (kept > 0).sum(axis=1)
+        k = np.arange(sizes.shape[1])
+
+        # Spread the free positions in gaps before each cluster plus a trailing one (uniform composition)
+        free = seq_len - lead - budget
+        weights = self.rng.exponential(size=(len(b), sizes.shape[1] + 1))
+        weights[np.arange(sizes.shape[1] + 1)[None, :] > n_clusters[:, None]] = 0
+        gaps = np.floor(free[:, None] * weights / weights.sum(axis=1, keepdims=True)).astype(np.int64)[:, :-1]
+        gaps[k[None, :] >= n_clusters[:, None]] = 0
+
+        starts = lead[:, None] + np.cumsum(gaps + kept, axis=1) - kept
+        ends = starts + kept
+
+        # Spans of the clusters (and of the one left over by the previous chunk), clusters never overlap
+        column, cluster = np.nonzero(kept)
+        leading = np.nonzero(lead)[0]
+        spans = np.concatenate([
+            np.stack([b[leading], np.zeros_like(leading), lead[leading], j[leading]], axis=1),
+            np.stack([b[column], starts[column, cluster], ends[column, cluster], j[column]], axis=1),
+        ])
+
+        if carry is not None:
+            # A cluster touching the end of the chunk continues in the next one with the part cut by the budget
+            last = np.maximum(n_clusters - 1, 0)
+            rows = np.arange(len(b))
+            touching = (n_clusters > 0) & (ends[rows, last] == seq_len)
+            carry[b[touching], j[touching]] += (sizes - kept)[rows, last][touching]
+
+        mask = IntervalMask(shape, spans)
+        return mask if self.sparse else mask.to_dense()
+
+    def _draw_cluster_sizes(self, size: tuple[int, int]) -> np.ndarray:
+        return np.maximum(1, self.rng.normal(self.cluster_size, self.cluster_variance, size).astype(np.int64))
 
 if __name__ == "__main__":
     generator = MaskGenerator(
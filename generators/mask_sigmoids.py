@@ -1,7 +1,14 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Literal
 import numpy as np
-from .base import BaseGenerator
+from .base import BaseGenerator, SeedLike
+from .intervals import IntervalMask, concat_ranges
+
+
+# Points of the peaks evaluated at once when summing a dense mask, and largest number of mask points per peak point
+# for which the sum is a bincount over the whole mask of the group
+GROUP_POINTS = 2 ** 16
+DENSE_RATIO = 16
 
 
 class SigmoidMaskGenerator(BaseGenerator):
@@ -15,6 +22,9 @@ class SigmoidMaskGenerator(BaseGenerator):
         peak_length: float = 50.0,
         length_variance: float = 10.0,
         steepness: float = 0.1,
+        sparse: bool = False,
+        seed: SeedLike = None,
+        dtype: np.dtype = np.float64,
     ):
         """
         Initialize the SigmoidMaskGenerator with double sigmoid peaks.
@@ -28,13 +38,25 @@ class SigmoidMaskGenerator(BaseGenerator):
             peak_length (float): Average length of each peak.
             length_variance (float): Variance in the length of peaks.
             steepness (float): Steepness parameter k for the sigmoid functions.
+            sparse (bool): Generate IntervalMask objects (spans around the peaks with the mask values as weights)
+                instead of dense arrays.
+            seed: (SeedLike): seed of the random stream, see `BaseGenerator`.
+            dtype: (np.dtype): float type of the generated TS.
         """
 
-        super().__init__(shape, ts, combine_domain, combine_mode)
+        super().__init__(shape, ts, combine_domain, combine_mode, seed, dtype)
         self.num_peaks = num_peaks
         self.peak_length = peak_length
         self.length_variance = length_variance
         self.steepness = steepness
+        self.sparse = sparse
+
+    # Half width of the window around [a, b] where a peak is evaluated, in units of 1/steepness.
+    # Outside of it the peak is below e^-20 and is left to zero.
+    support_window = 20.0
+
+    # Points below this value are left out of sparse masks
+    sparse_threshold = 1e-6
 
     def _double_sigmoid(self, x: np.ndarray, a: float, b: float, k: float) -> np.ndarray:
         """
@@ -49,46 +71,161 @@ class SigmoidMaskGenerator(BaseGenerator):
         Returns:
             Array with double sigmoid values
         """
-        sigmoid1 = 1 / (1 + np.exp(-k * (x - a)))
-        sigmoid2 = 1 / (1 + np.exp(-k * (x - b)))
-        return sigmoid1 - sigmoid2
+        # 1/(1+e^(-z)) = (1 + tanh(z/2)) / 2, which never overflows
+        return 0.5 * (np.tanh(0.5 * k * (x - a)) - np.tanh(0.5 * k * (x - b)))
 
-    def generate(self) -> np.ndarray:
+    def _generate(self, shape: tuple[int, int, int], out: np.ndarray | None = None) -> np.ndarray:
         """
         Generate a float mask with double sigmoid peaks.
-        
+
         Returns:
-            np.ndarray: Float array of shape self.shape with values between 0 and 1
+            np.ndarray | IntervalMask: Float array of the given shape with values between 0 and 1,
+                or its spans with the values as weights if the generator is sparse.
         """
-        mask = np.zeros(self.shape, dtype=np.float64)
-        
-        # Create x-axis for the time series
-        x = np.arange(self.seq_len)
-        
-        for j in range(self.no_variates):
-            variate_mask = np.zeros(self.seq_len, dtype=np.float64)
-            
-            for _ in range(self.num_peaks):
-                current_length = np.random.normal(self.peak_length, self.length_variance)
-                
-                center = np.random.uniform(current_length / 2, self.seq_len - current_length / 2)
-                
-                a = center - current_length / 2
-                b = center + current_length / 2
-                
-                peak = self._double_sigmoid(x, a, b, self.steepness)
-                
-                # Add to variate mask (sum overlapping peaks)
-                variate_mask += peak
-            
-            # Clip values to [0, 1] range in case of overlapping peaks
-            variate_mask = np.clip(variate_mask, 0.0, 1.0)
-            
-            # Assign to the mask
-            mask[:, j] = variate_mask
-            
+        batch_size, seq_len, no_variates = shape
+
+        # Draw all peaks of all variates, (batch_size, no_variates, num_peaks)
+        peaks_shape = (batch_size, no_variates, self.num_peaks)
+        current_length = self.rng.normal(self.peak_length, self.length_variance, peaks_shape)
+
+        # Uniform in [current_length / 2, seq_len - current_length / 2], also when the peak is longer than seq_len
+        center = current_length / 2 + self.rng.random(peaks_shape) * (seq_len - current_length)
+
+        batch, variate, _ = np.indices(peaks_shape).reshape(3, -1)
+        a = (center - current_length / 2).ravel()
+        b = (center + current_length / 2).ravel()
+        return self._peaks_mask(shape, batch, variate, a, b, out=out)
+
+    def _init_stream(self, shape: tuple[int, int, int]) -> dict:
+        # Peaks already under way at the start of the stream are drawn too, so the stream starts stationary
+        half_window = self.support_window / self.steepness
+        lead = abs(self.peak_length) + 3 * self.length_variance + 2 * half_window
+        peaks = self._draw_peaks(shape[0], shape[2], -int(np.ceil(lead)), int(np.ceil(lead)))
+        return {"position": 0, "peaks": peaks}
+
+    def _generate_chunk(self, shape: tuple[int, int, int], state: dict) -> np.ndarray:
+        """
+        Peaks start at a rate of num_peaks per seq_len steps in every variate (a Poisson process), and the peaks
+        crossing the end of a chunk carry on into the next one, so the mask density doesn't depend on chunk_len.
+        """
+        batch_size, chunk_len, no_variates = shape
+        position = state["position"]
+        new = self._draw_peaks(batch_size, no_variates, position, chunk_len)
+        batch, variate, a, b = (np.concatenate([old, fresh]) for old, fresh in zip(state["peaks"], new))
+        mask = self._peaks_mask(shape, batch, variate, a, b, offset=position)
+
+        # Keep the peaks whose window reaches the next chunk
+        half_window = self.support_window / self.steepness
+        pending = np.ceil(np.maximum(a, b) + half_window) + 1 > position + chunk_len
+        state["peaks"] = (batch[pending], variate[pending], a[pending], b[pending])
+        state["position"] += chunk_len
+        return mask
+
+    def _draw_peaks(
+        self, batch_size: int, no_variates: int, start: int, length: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(batch, variate, a, b) of the peaks whose window starts in the steps [start, start + length)."""
+        counts = self.rng.poisson(self.num_peaks / self.seq_len * length, (batch_size, no_variates))
+        batch, variate = np.indices(counts.shape).reshape(2, -1)
+        batch, variate = np.repeat(batch, counts.ravel()), np.repeat(variate, counts.ravel())
+
+        current_length = self.rng.normal(self.peak_length, self.length_variance, len(batch))
+        window_start = start + self.rng.random(len(batch)) * length
+        a = window_start + self.support_window / self.steepness + np.maximum(-current_length, 0)
+        return batch, variate, a, a + current_length
+
+    def _peaks_mask(
+        self,
+        shape: tuple[int, int, int],
+        batch: np.ndarray,
+        variate: np.ndarray,
+        a: np.ndarray,
+        b: np.ndarray,
+        offset: int = 0,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray | IntervalMask:
+        """Mask of the steps [offset, offset + seq_len) of the peaks [a, b] of the given (batch, variate)."""
+        batch_size, seq_len, no_variates = shape
+
+        # Evaluate each peak only on its support window
+        half_window = self.support_window / self.steepness
+        start = np.clip(np.floor(np.minimum(a, b) - half_window) - offset, 0, seq_len).astype(np.int64)
+        stop = np.clip(np.ceil(np.maximum(a, b) + half_window) + 1 - offset, 0, seq_len).astype(np.int64)
+        if self.sparse:
+            x, row, peak = self._peak_points(start, stop, a, b, offset)
+            return self._spans(shape, batch[row], x, variate[row], peak)
+
+        # The groups are summed into flat views of the mask
+        if out is not None and out.flags.c_contiguous:
+            mask = out
+            mask.fill(0)
+        else:
+            mask = np.zeros(shape, dtype=self.dtype)
+
+        # Sum overlapping peaks a few samples at a time, so that the temporaries of the points stay in cache and a
+        # batch costs no more per sample than a single TS. A bincount over the flat index of the group is much
+        # faster than np.add.at, unless the peaks cover a small part of a long TS
+        order = np.argsort(batch, kind="stable")
+        points = np.bincount(batch, weights=stop - start, minlength=batch_size)
+        group = max(1, int(GROUP_POINTS // max(points.mean(), 1)))
+        firsts = np.arange(0, batch_size, group)
+        bounds = np.searchsorted(batch[order], np.append(firsts, batch_size))
+        for first, low, high in zip(firsts, bounds[:-1], bounds[1:]):
+            last = min(first + group, batch_size)
+            peaks = order[low:high]
+            x, row, peak = self._peak_points(start[peaks], stop[peaks], a[peaks], b[peaks], offset)
+            flat = ((batch[peaks] - first) * seq_len)[row] + x
+            flat *= no_variates
+            flat += variate[peaks][row]
+            size = (last - first) * seq_len * no_variates
+            if size <= DENSE_RATIO * len(flat):
+                mask[first:last] = np.bincount(flat, weights=peak, minlength=size).reshape(-1, seq_len, no_variates)
+            else:
+                np.add.at(mask[first:last].reshape(-1), flat, peak)
+
+        # Clip values to [0, 1] range in case of overlapping peaks
+        np.clip(mask, 0.0, 1.0, out=mask)
+        if out is not None and mask is not out:
+            np.copyto(out, mask)
+            mask = out
         return mask
 
+    def _peak_points(
+        self, start: np.ndarray, stop: np.ndarray, a: np.ndarray, b: np.ndarray, offset: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(time, peak, value) of every point of the windows [start, stop) of the peaks [a, b], without padding."""
+        x, row = concat_ranges(start, stop - start)
+        peak = self._double_sigmoid(x + offset, a[row], b[row], self.steepness).astype(self.dtype, copy=False)
+        return x, row, peak
+
+    def _spans(
+        self, shape: tuple[int, int, int], batch: np.ndarray, x: np.ndarray, variate: np.ndarray, peak: np.ndarray
+    ) -> IntervalMask:
+        """
+        Interval mask of the union of the peak windows, overlapping peaks are summed and clipped.
+        Points below `sparse_threshold` are dropped.
+        """
+        batch_size, seq_len, no_variates = shape
+
+        # Sort the points by (batch, variate, time), the order of the spans
+        position, inverse = np.unique((batch * no_variates + variate) * seq_len + x, return_inverse=True)
+        value = np.bincount(inverse, weights=peak, minlength=len(position)).astype(self.dtype)
+        np.clip(value, 0.0, 1.0, out=value)
+
+        keep = value >= self.sparse_threshold
+        position, value = position[keep], value[keep]
+
+        column, time = np.divmod(position, seq_len)
+        first = np.ones(len(position), dtype=np.bool_)
+        first[1:] = np.diff(position) != 1
+        first |= time == 0
+        last = np.roll(first, -1)
+
+        spans = np.stack([
+            column[first] // no_variates, time[first], time[last] + 1, column[first] % no_variates,
+        ], axis=1)
+        return IntervalMask(shape, spans, value)
+
 
 if __name__ == "__main__":
     generator = SigmoidMaskGenerator(
@@ -1,9 +1,9 @@
 import numpy as np
-from .base import BaseGenerator
+from .base import PointwiseGenerator, SeedLike
 from typing import Literal
 
 
-class NormalGenerator(BaseGenerator):
+class NormalGenerator(PointwiseGenerator):
     def __init__(
         self,
         shape: tuple[int] = None,
@@ -12,6 +12,8 @@ class NormalGenerator(BaseGenerator):
         combine_mode: Literal["add", "mul"] | None = None,
         mean=0.0,
         std=0.1,
+        seed: SeedLike = None,
+        dtype: np.dtype = np.float64,
     ):
         """
         Initialize the NormalNoiseGenerator.
@@ -25,16 +27,17 @@ class NormalGenerator(BaseGenerator):
                 Mean of the Gaussian noise to be added.
             std : float, default=0.1
                 Standard deviation of the Gaussian noise to be added.
+            seed: (SeedLike): seed of the random stream, see `BaseGenerator`.
+            dtype: (np.dtype): float type of the generated TS.
         """
-        super().__init__(shape, ts, combine_domain, combine_mode)
+        super().__init__(shape, ts, combine_domain, combine_mode, seed, dtype)
         self.mean = mean
         self.std = std
 
-    def generate(self) -> np.ndarray:
-
-        noise = np.random.normal(self.mean, self.std, self.shape)
-
-        return noise
+    def _fill(self, values: np.ndarray):
+        self.rng.standard_normal(dtype=values.dtype, out=values)
+        values *= self.std
+        values += self.mean
 
 
 if __name__ == "__main__":
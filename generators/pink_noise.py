@@ -1,6 +1,97 @@
 import numpy as np
-from .base import BaseGenerator
+from .base import BaseGenerator, SeedLike
 from typing import Literal
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@lru_cache(maxsize=32)
+def spectral_filter(seq_len: int, alpha: float) -> np.ndarray:
+    """
+    1/f^(alpha/2) amplitude filter over the rfft frequencies of a seq_len long TS, as a (seq_len // 2 + 1, 1) column.
+
+    The DC bin is set to zero, the noise has zero mean.
+    """
+    freqs = np.fft.rfftfreq(seq_len)
+    gain = np.zeros_like(freqs)
+    gain[1:] = freqs[1:] ** (-alpha / 2.0)
+    gain.flags.writeable = False
+    return gain[:, None]
+
+
+# Streamed noise: poles of the filter bank per octave, octaves of poles below 1 / seq_len, and time steps of the
+# blocks the bank is run over
+POLES_PER_OCTAVE = 2
+LOW_OCTAVES = 2
+BLOCK_LEN = 128
+
+
+@dataclass(frozen=True)
+class FilterBank():
+    """
+    Bank of one-pole filters y_k[t] = a_k * y_k[t - 1] + (1 - a_k) * e[t] driven by the same white noise e, as matrices
+    running it over blocks of BLOCK_LEN steps. The output is direct * e[t] + sum_k weights_k * y_k[t].
+    """
+    poles: np.ndarray
+    # (BLOCK_LEN, BLOCK_LEN) output of a block from its noise, i.e. the impulse response of the bank
+    response: np.ndarray
+    # (BLOCK_LEN, no_poles) output of a block from the filter states before it
+    carry: np.ndarray
+    # (no_poles, BLOCK_LEN) filter states after a block from its noise
+    feed: np.ndarray
+    # (no_poles, no_poles) square root of the stationary covariance of the filter states
+    stationary: np.ndarray
+
+
+@lru_cache(maxsize=32)
+def filter_bank(seq_len: int, alpha: float) -> FilterBank:
+    """
+    Filter bank approximating the 1/f^(alpha/2) filter of `spectral_filter`, for 0 <= alpha <= 2.
+
+    The filter is a cascade of first order sections with log-spaced poles, POLES_PER_OCTAVE from LOW_OCTAVES below
+    1 / seq_len to Nyquist, each followed by a zero alpha / 2 of the way to the next pole: every section lowers the
+    gain by the 1/f^(alpha/2) slope over its octave fraction. Below the lowest pole the gain is flat, the extra
+    octaves keep the slope down to the lowest FFT bin. A last section with a negative pole and zero makes up for the
+    flattening of the digital sections near Nyquist. The PSD stays within 0.6 dB of 1/f^alpha from 1 / seq_len to
+    Nyquist. The cascade is expanded in partial fractions into the parallel bank, normalized to a unit variance
+    output.
+
+    The bank is kept in float64: in float32 the poles closest to 1 round to 1 and their sections never forget.
+    """
+    octaves = np.log2(seq_len / 2) + LOW_OCTAVES
+    no_poles = max(int(np.ceil(POLES_PER_OCTAVE * octaves)), 0) + 1
+    corners = np.geomspace(0.5 / 2 ** octaves, 0.5, no_poles) if no_poles > 1 else np.array([0.5])
+    poles = np.append(np.exp(-2 * np.pi * corners), -1 / 3)
+    zeros = np.append(np.exp(-2 * np.pi * corners * 2 ** (alpha / 2 / POLES_PER_OCTAVE)), -(1 + alpha / 4) / 3)
+
+    # H(z) = prod_k (1 - zeros_k / z) / (1 - poles_k / z) = direct + sum_k residues_k / (1 - poles_k / z)
+    direct = np.prod(zeros / poles)
+    ratios = poles[None, :] / poles[:, None]
+    np.fill_diagonal(ratios, 0.0)
+    residues = np.prod(1 - zeros[None, :] / poles[:, None], axis=1) / np.prod(1 - ratios, axis=1)
+
+    # Variance of the output, and stationary covariance of the filter states
+    gains = 1 - poles
+    covariance = np.outer(gains, gains) / (1 - np.outer(poles, poles))
+    weights = residues / gains
+    variance = direct ** 2 + 2 * direct * residues.sum() + weights @ covariance @ weights
+    direct, weights = direct / np.sqrt(variance), weights / np.sqrt(variance)
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    stationary = eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+    steps = np.arange(BLOCK_LEN)
+    powers = poles[None, :] ** steps[:, None]
+    impulse = powers @ (weights * gains)
+    impulse[0] += direct
+    lags = steps[:, None] - steps[None, :]
+    response = np.where(lags >= 0, impulse[np.clip(lags, 0, None)], 0.0)
+    carry = poles * powers * weights
+    feed = (gains * powers[::-1]).T
+
+    arrays = [np.ascontiguousarray(array) for array in (poles, response, carry, feed, stationary)]
+    for array in arrays:
+        array.flags.writeable = False
+    return FilterBank(*arrays)
 
 
 class PinkNoiseGenerator(BaseGenerator):
@@ -12,6 +103,8 @@ class PinkNoiseGenerator(BaseGenerator):
         combine_mode: Literal["add", "mul"] | None = None,
         alpha=1.0,
         amplitude=1.0,
+        seed: SeedLike = None,
+        dtype: np.dtype = np.float64,
     ):
         """
         Initialize the PinkNoiseGenerator (1/f^alpha noise).
@@ -25,41 +118,84 @@ class PinkNoiseGenerator(BaseGenerator):
                 Spectral decay exponent (1.0 for pink noise, 2.0 for brown noise).
             amplitude : float, default=1.0
                 Overall amplitude scaling factor.
+            seed: (SeedLike): seed of the random stream, see `BaseGenerator`.
+            dtype: (np.dtype): float type of the generated TS.
         """
-        super().__init__(shape, ts, combine_domain, combine_mode)
+        super().__init__(shape, ts, combine_domain, combine_mode, seed, dtype)
         self.alpha = alpha
         self.amplitude = amplitude
 
-    def generate(self) -> np.ndarray:
+    def _generate(self, shape: tuple[int, int, int], out: np.ndarray | None = None) -> np.ndarray:
         """
         Generate pink noise using FFT method.
+
+        The white noise spectrum is drawn directly in the frequency domain, so only the inverse FFT is needed.
         """
-        noise = np.zeros(self.shape)
-        
-        for variate in range(self.no_variates):
-            # Generate white noise in frequency domain
-            white_noise = np.random.randn(self.seq_len)
-            
-            # Compute FFT
-            fft = np.fft.rfft(white_noise)
-            
-            # Create frequency array (avoiding division by zero)
-            freqs = np.fft.rfftfreq(self.seq_len)
-            freqs[0] = 1e-10  # Avoid division by zero
-            
-            # Apply 1/f^alpha scaling
-            fft = fft / (freqs ** (self.alpha / 2.0))
-            
-            # Transform back to time domain
-            pink = np.fft.irfft(fft, n=self.seq_len)
-            
-            # Normalize and scale
-            pink = pink / np.std(pink) * self.amplitude
-            
-            noise[:, variate] = pink
-        
+        batch_size, seq_len, no_variates = shape
+        no_freqs = seq_len // 2 + 1
+
+        # Spectrum of white noise: complex normal bins, real DC and Nyquist bins
+        spectrum = self.rng.standard_normal((batch_size, no_freqs, 2 * no_variates), dtype=self.dtype)
+        spectrum = spectrum.view(np.result_type(self.dtype, np.complex64))
+        spectrum[:, 0] = np.sqrt(2) * spectrum[:, 0].real
+        if seq_len % 2 == 0:
+            spectrum[:, -1] = np.sqrt(2) * spectrum[:, -1].real
+
+        # Apply 1/f^alpha scaling
+        spectrum *= spectral_filter(seq_len, self.alpha).astype(self.dtype, copy=False)
+
+        # Transform back to time domain
+        noise = np.fft.irfft(spectrum, n=seq_len, axis=-2).astype(self.dtype, copy=False)
+
+        # Normalize and scale
+        noise *= (self.amplitude / np.std(noise, axis=-2, keepdims=True)).astype(self.dtype, copy=False)
+
         return noise
 
+    def _init_stream(self, shape: tuple[int, int, int]) -> dict:
+        if not 0 <= self.alpha <= 2:
+            raise ValueError(f"Streamed noise needs 0 <= alpha <= 2, got {self.alpha}.")
+        bank = filter_bank(self.seq_len, float(self.alpha))
+        # Filter states drawn from their stationary distribution, so the stream has no warm-up transient
+        states = bank.stationary @ self.rng.standard_normal((shape[0], len(bank.poles), shape[2]))
+        return {"bank": bank, "states": states}
+
+    def _generate_chunk(self, shape: tuple[int, int, int], state: dict) -> np.ndarray:
+        """
+        Filter white noise through the bank of `filter_bank`, carrying its filter states from one chunk to the next.
+
+        Memory is O(chunk_len) and the state O(no_poles) per variate, so the stream can be far longer than memory and
+        keeps correlations up to the seq_len time scale. Chunks are scaled by the stationary std of the noise instead
+        of the std of each TS. The filtering runs in float64, only the chunk is in the dtype of the generator.
+        """
+        batch_size, chunk_len, no_variates = shape
+        bank, states = state["bank"], state["states"]
+        noise = self.rng.standard_normal(shape)
+        chunk = self.new_ts(shape)
+
+        # Whole blocks at once, only the filter states between blocks are scanned one block after the other
+        blocks = chunk_len // BLOCK_LEN * BLOCK_LEN
+        if blocks:
+            block_noise = noise[:, :blocks].reshape(batch_size, -1, BLOCK_LEN, no_variates)
+            inputs = bank.feed @ block_noise
+            carries = np.empty_like(inputs)
+            decay = (bank.poles ** BLOCK_LEN)[:, None]
+            for block in range(inputs.shape[1]):
+                carries[:, block] = states
+                states = decay * states + inputs[:, block]
+            block_noise = bank.response @ block_noise
+            block_noise += bank.carry @ carries
+            chunk[:, :blocks] = block_noise.reshape(batch_size, blocks, no_variates)
+
+        tail = chunk_len - blocks
+        if tail:
+            tail_noise = noise[:, blocks:]
+            chunk[:, blocks:] = bank.response[:tail, :tail] @ tail_noise + bank.carry[:tail] @ states
+            states = (bank.poles ** tail)[:, None] * states + bank.feed[:, -tail:] @ tail_noise
+
+        state["states"] = states
+        chunk *= self.amplitude
+        return chunk
 
 if __name__ == "__main__":
     generator = PinkNoiseGenerator(
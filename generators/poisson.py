@@ -1,9 +1,9 @@
 import numpy as np
-from .base import BaseGenerator
+from .base import PointwiseGenerator, SeedLike
 from typing import Literal
 
 
-class PoissonGenerator(BaseGenerator):
+class PoissonGenerator(PointwiseGenerator):
     def __init__(
         self,
         shape: tuple[int] = None,
@@ -11,6 +11,8 @@ class PoissonGenerator(BaseGenerator):
         combine_domain: Literal["time", "frequency"] = None,
         combine_mode: Literal["add", "mul"] | None = None,
         lam=1.0,
+        seed: SeedLike = None,
+        dtype: np.dtype = np.float64,
     ):
         """
         Initialize the PoissonGenerator.
@@ -22,15 +24,15 @@ class PoissonGenerator(BaseGenerator):
             combine_mode (str): Mode in which the combine operation happens when `apply` method is called ('add' or 'mul').
             lam : float, default=1.0
                 Lambda parameter (expected number of events) of the Poisson distribution.
+            seed: (SeedLike): seed of the random stream, see `BaseGenerator`.
+            dtype: (np.dtype): float type of the generated TS.
         """
-        super().__init__(shape, ts, combine_domain, combine_mode)
+        super().__init__(shape, ts, combine_domain, combine_mode, seed, dtype)
         self.lam = lam
 
-    def generate(self) -> np.ndarray:
-
-        noise = np.random.poisson(self.lam, self.shape).astype(float)
-
-        return noise
+    def _fill(self, values: np.ndarray):
+        # Poisson counts are drawn as integers, then cast into the output
+        np.copyto(values, self.rng.poisson(self.lam, values.shape), casting="unsafe")
 
 
 if __name__ == "__main__":
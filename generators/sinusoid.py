@@ -1,4 +1,4 @@
-from .base import BaseGenerator
+from .base import BaseGenerator, SeedLike
 import numpy as np
 from typing import Literal
 
@@ -15,7 +15,9 @@ class SinusoidGenerator(BaseGenerator):
         max_frequency: bool = 5,
         amplitude = 1.0,
         phase = 0.0,
-        random_phase = True
+        random_phase = True,
+        seed: SeedLike = None,
+        dtype: np.dtype = np.float64,
     ):
         """
         Initialize the SinusoidGenerator.
@@ -38,9 +40,11 @@ class SinusoidGenerator(BaseGenerator):
                 Phase shift of the sinusoidal signal.
             random_phase : bool, default=True
                 Whether to add a small random phase shift to each variate.
+            seed: (SeedLike): seed of the random stream, see `BaseGenerator`.
+            dtype: (np.dtype): float type of the generated TS.
 
         """
-        super().__init__(shape, ts, combine_domain, combine_mode)
+        super().__init__(shape, ts, combine_domain, combine_mode, seed, dtype)
         self.frequency = frequency
         self.amplitude = amplitude
         self.phase = phase
@@ -48,27 +52,50 @@ class SinusoidGenerator(BaseGenerator):
         self.max_frequency = max_frequency
         self.random_phase = random_phase
 
-    def generate(self) -> np.ndarray:
+    def _draw_waves(self, batch_size: int, no_variates: int) -> tuple[np.ndarray, np.ndarray]:
+        """Draw frequency and phase of each variate, as (batch_size, 1, no_variates) arrays."""
 
-        seq_len, no_variates = self.shape
-        t = np.linspace(0, 2 * np.pi, seq_len)  # Time vector
+        # Frequency for each variate
+        if self.random_frequency:
+            freq = self.rng.integers(1, self.max_frequency, (batch_size, 1, no_variates))
+        else:
+            freq = np.full((batch_size, 1, no_variates), self.frequency)
 
-        data = []
-        for i in range(no_variates):
-            # Frequency for this variate
-            freq = np.random.randint(1, self.max_frequency) if self.random_frequency else self.frequency
-            # Phase shift (constant + small random if enabled)
-            if self.random_phase:
-                self.phase += np.random.uniform(-1, 1)
+        # Phase shift (constant + small random if enabled), the random shift accumulates across variates
+        if self.random_phase:
+            phase = self.phase + np.cumsum(self.rng.uniform(-1, 1, (batch_size, 1, no_variates)), axis=-1)
+        else:
+            phase = np.full((batch_size, 1, no_variates), self.phase)
 
-            # Base sine wave
-            signal = self.amplitude * np.sin(freq * t + self.phase)
-            
+        return freq, phase
 
-            data.append(signal)
+    def _generate(self, shape: tuple[int, int, int], out: np.ndarray | None = None) -> np.ndarray:
 
-        return np.array(data).T
+        batch_size, seq_len, no_variates = shape
+        t = np.linspace(0, 2 * np.pi, seq_len, dtype=self.dtype)[None, :, None]  # Time vector
+        freq, phase = self._draw_waves(batch_size, no_variates)
 
+        # Base sine wave
+        signal = np.multiply(freq, t, out=self.new_ts(shape, out))
+        signal += phase
+        np.sin(signal, out=signal)
+        signal *= self.amplitude
+        return signal
+
+    def _init_stream(self, shape: tuple[int, int, int]) -> dict:
+        freq, phase = self._draw_waves(shape[0], shape[2])
+        return {"freq": freq, "phase": phase}
+
+    def _generate_chunk(self, shape: tuple[int, int, int], state: dict) -> np.ndarray:
+        # Same time step of `generate`, the phase reached at the end of the chunk is kept (wrapped) for the next one
+        dt = 2 * np.pi / max(self.seq_len - 1, 1)
+        t = np.arange(shape[1])[None, :, None] * dt
+        chunk = np.multiply(state["freq"], t, out=self.new_ts(shape))
+        chunk += state["phase"]
+        np.sin(chunk, out=chunk)
+        chunk *= self.amplitude
+        state["phase"] = (state["phase"] + state["freq"] * shape[1] * dt) % (2 * np.pi)
+        return chunk
 
 if __name__ == "__main__":
     generator = SinusoidGenerator(
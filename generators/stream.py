@@ -0,0 +1,103 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
+import numpy as np
+from .dataset import Pipeline
+
+
+class _Failure():
+    """Exception raised by the producer, handed over to the consumer."""
+
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+_END = object()
+
+
+class Emitter():
+    """
+    Live feed of a pipeline for online detectors: an async iterator of (ts, raw_ts, mask_ts) chunks of an
+    endless sample (see `Pipeline.generate_chunks`), emitted at `rate` rows per second.
+
+    Chunks are generated in an executor, so the event loop is never blocked, and at most `max_queued` chunks are
+    generated ahead: when the consumer falls behind, generation waits.
+
+        async for ts, raw_ts, mask_ts in Emitter(pipeline, chunk_len=256, rate=10_000):
+            detector.update(ts)
+    """
+
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        chunk_len: int,
+        rate: float | None = None,
+        n_chunks: int | None = None,
+        batch_size: int | None = None,
+        segment_len: int | None = None,
+        max_queued: int = 4,
+        executor: ThreadPoolExecutor | None = None,
+    ):
+        """
+        Args:
+            pipeline (Pipeline): Recipe of the feed.
+            chunk_len (int): Rows of each chunk.
+            rate (float | None): Rows per second. None to emit as fast as the consumer takes the chunks.
+            n_chunks (int | None): Number of chunks to emit. If None the feed never ends.
+            batch_size (int | None): Number of parallel feeds, chunks are (batch_size, chunk_len, no_variates) if given.
+            segment_len (int | None): Rows after which the anomalies that fire are drawn again, see `Pipeline.generate_chunks`.
+            max_queued (int): Chunks generated ahead of the consumer.
+            executor (ThreadPoolExecutor | None): Executor of the generation, the default one of the loop if None.
+                The chunks of a feed are generated one after the other, NumPy releases the GIL meanwhile.
+        """
+        self.pipeline = pipeline
+        self.chunk_len = chunk_len
+        self.rate = rate
+        self.n_chunks = n_chunks
+        self.batch_size = batch_size
+        self.segment_len = segment_len
+        self.max_queued = max_queued
+        self.executor = executor
+
+    async def _produce(self, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        chunks = self.pipeline.generate_chunks(self.chunk_len, self.n_chunks, self.batch_size, self.segment_len)
+        try:
+            while (chunk := await loop.run_in_executor(self.executor, next, chunks, _END)) is not _END:
+                # Waits while the queue is full, i.e. while the consumer is behind
+                await queue.put(chunk)
+        except Exception as exception:
+            await queue.put(_Failure(exception))
+            return
+        await queue.put(_END)
+
+    async def _emit(self) -> AsyncIterator[tuple[np.ndarray, np.ndarray, np.ndarray | None]]:
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(self.max_queued)
+        producer = asyncio.create_task(self._produce(queue))
+        start, rows = loop.time(), 0
+        try:
+            while (chunk := await queue.get()) is not _END:
+                if isinstance(chunk, _Failure):
+                    raise chunk.exception
+
+                if self.rate is not None:
+                    # Chunk k is due at k * chunk_len / rate seconds from the start
+                    delay = start + rows / self.rate - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                rows += self.chunk_len
+                yield chunk
+        finally:
+            producer.cancel()
+
+    def __aiter__(self) -> AsyncIterator[tuple[np.ndarray, np.ndarray, np.ndarray | None]]:
+        return self._emit()
+
+    async def to_queue(self, queue: asyncio.Queue, end=None):
+        """
+        Forward the chunks to `queue` (e.g. the stand-in of a socket), then `end`. Emission waits while the queue is full.
+        """
+        async for chunk in self:
+            await queue.put(chunk)
+        await queue.put(end)
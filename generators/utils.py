@@ -1,49 +1,452 @@
+from contextlib import nullcontext
 from dataclasses import dataclass
-from .base import BaseGenerator
+from .base import BaseGenerator, SeedLike, make_rng, to_frequency, to_time
+from .hooks import CallReport, Hook, Stopwatch
+from .intervals import IntervalMask
+from .labels import AppliedGenerator, Labels, merge_spans, spans_from_flags, spans_from_points
 import numpy as np
-import random
 
 @dataclass
 class Maybe():
+    """
+    A generator applied with some probability.
+
+    Attributes:
+        generator (BaseGenerator): The generator to apply.
+        mask (np.ndarray | IntervalMask | BaseGenerator | None): Mask of the generator. A mask generator is run only
+            when the entry fires, once per call of Some even if shared by several entries.
+        probability (float): Probability of the entry firing at each call of Some.
+        seed (int | SeedSequence | np.random.Generator | None): Optional seed of the generator and of the mask generator.
+    """
     generator: BaseGenerator
     mask: BaseGenerator = None
     probability: float = 0.5
+    seed: SeedLike = None
+
+    def __post_init__(self):
+        if self.seed is not None:
+            self.reseed(self.seed)
+
+    def reseed(self, seed: SeedLike):
+        """Give the generator (and the mask, when it is a generator) independent child streams of `seed`."""
+        generator_rng, mask_rng = make_rng(seed).spawn(2)
+        self.generator.reseed(generator_rng)
+        if isinstance(self.mask, BaseGenerator):
+            self.mask.reseed(mask_rng)
     
     def __str__(self):
         return f"Generator {self.generator} with p={self.probability})"
     
 
+def _take(mask_ts: np.ndarray | IntervalMask | None, samples: np.ndarray) -> np.ndarray | IntervalMask | None:
+    """Masks of some samples of a batched mask, a single mask is shared by every sample."""
+    if mask_ts is None or mask_ts.ndim < 3:
+        return mask_ts
+    if isinstance(mask_ts, IntervalMask):
+        return mask_ts.take(samples)
+    return mask_ts[samples]
+
+
+def _window(mask_ts: np.ndarray | IntervalMask | None, start: int, length: int) -> np.ndarray | IntervalMask | None:
+    """Steps [start, start + length) of a mask repeated along time."""
+    if mask_ts is None:
+        return None
+    if isinstance(mask_ts, IntervalMask):
+        return mask_ts.window(start, length)
+    seq_len = mask_ts.shape[-2]
+    start %= seq_len
+    if start + length <= seq_len:
+        return mask_ts[..., start:start + length, :]
+    return np.take(mask_ts, np.arange(start, start + length) % seq_len, axis=-2)
+
+
+def _untimed(name: str):
+    return nullcontext()
+
+
 class Some():
     """Apply only SOME of generators"""
-    def __init__(self, generators: list[Maybe], shuffle = False, max_generators = None):
+    def __init__(
+        self,
+        generators: list[Maybe],
+        shuffle = False,
+        max_generators = None,
+        seed: SeedLike = None,
+        hooks: list[Hook] = (),
+    ):
         """
         Initialize the Some generator.
         
         Args:
             generators (list[Maybe]): List of Maybe generator objects.
-            shuffle (bool): Whether to shuffle the order of generators before applying.
-            max_generators (int | None): Maximum number of generators to apply. If None, apply all.
+            shuffle (bool): Whether to shuffle the order of generators at each call.
+            max_generators (int | None): Maximum number of generators considered at each call, the first ones
+                of the (shuffled) order. If None, consider all.
+            seed (int | SeedSequence | np.random.Generator | None): Seed of the random stream used to pick and shuffle
+                the generators. If given, every Maybe is also reseeded with an independent child stream.
+            hooks (list[Hook]): Receivers of the skipped and applied entries, with their timings (see `hooks`),
+                e.g. [PrintHook()] to print them or a ProfileHook to find the costly generators. Nothing by default.
         """
         
-        
         self.generators = generators
-        self._r = np.random.rand(len(generators))
-        
-        if shuffle:
-            random.shuffle(self.generators)
-            
-        if max_generators is not None:
-            self.generators = self.generators[:max_generators]
+        self.shuffle = shuffle
+        self.max_generators = max_generators
+        self.hooks = list(hooks)
+        self._buffers = {}
+        if seed is not None:
+            self.reseed(seed)
+        else:
+            self.rng = make_rng(seed)
     
-    def generate_and_combine(self, first_ts: np.ndarray):
-        ts = first_ts.copy()
-        for index, elem in enumerate(self.generators):
-            if elem.probability < self._r[index]:
-                print(f"Skipped {elem} (index: {index}).")
+    def reseed(self, seed: SeedLike):
+        """Replace the random stream of Some and give every Maybe an independent child stream."""
+        self.rng = make_rng(seed)
+        for elem, child in zip(self.generators, self.rng.spawn(len(self.generators))):
+            elem.reseed(child)
+
+    def draw(self, batch_size: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Pick the Maybe entries of a call: their order and the Bernoulli draws of all of them at once.
+
+        Args:
+            batch_size (int | None): If given, the entries fire independently for each sample of the batch.
+                The order is shared by the whole batch.
+
+        Returns:
+            tuple: (indices of the considered entries in order of application, whether each of them fires,
+                a (batch_size, entries) matrix for a batch)
+        """
+        order = self.rng.permutation(len(self.generators)) if self.shuffle else np.arange(len(self.generators))
+        order = order[:self.max_generators]
+        probabilities = np.array([self.generators[index].probability for index in order], dtype=np.float64)
+        shape = len(order) if batch_size is None else (batch_size, len(order))
+        return order, self.rng.random(shape) < probabilities
+
+    def __getstate__(self):
+        # Scratch buffers are not worth sending to other processes
+        return {**self.__dict__, "_buffers": {}}
+
+    def _scratch(self, shape: tuple[int], dtype: np.dtype) -> np.ndarray:
+        """Scratch buffer reused by every call with the same shape and dtype."""
+        key = (shape, np.dtype(dtype))
+        if key not in self._buffers:
+            self._buffers[key] = np.empty(shape, dtype=dtype)
+        return self._buffers[key]
+
+    def generate_and_combine(
+        self,
+        first_ts: np.ndarray,
+        mask_ts: np.ndarray = None,
+        out: np.ndarray | None = None,
+        return_labels: bool = False,
+    ):
+        """
+        Apply the generators to the input time series.
+
+        The entries that fire are drawn again at every call and nothing is generated for the others, masks included.
+        Every generator writes into the same scratch buffer, which is kept between calls, and is combined in place
+        into the output, so the memory used does not depend on the number of generators.
+
+        Args:
+            first_ts (np.ndarray): Input time series, (seq_len, no_variates) or batched (batch_size, seq_len, no_variates).
+                Masks of the Maybe entries can be batched as well or a single (seq_len, no_variates) mask.
+            mask_ts (np.ndarray | IntervalMask): Optional mask used by the Maybe entries that don't have their own.
+            out (np.ndarray | None): Optional output buffer of the shape of `first_ts`, it can be `first_ts` itself
+                to apply the generators in place. The generators write in the dtype of the output, whatever their own.
+            return_labels (bool): If True, return also the Labels of the generated TS: the points changed by
+                any generator and, for each applied generator, its parameters and the spans it changed.
+                Frequency domain generators change the whole of the variates they touch.
+
+        Returns:
+            np.ndarray | tuple[np.ndarray, Labels]
+        """
+        if out is None:
+            # Float inputs keep their dtype (e.g. float32 end to end), other inputs become float64
+            ts = first_ts.astype(first_ts.dtype if np.issubdtype(first_ts.dtype, np.floating) else np.float64)
+        else:
+            ts = out
+            if out is not first_ts:
+                np.copyto(ts, first_ts)
+
+        batch_size = ts.shape[0] if ts.ndim == 3 else None
+        seq_len = ts.shape[-2]
+        scratch = self._scratch(ts.shape, ts.dtype)
+        labels = Labels(np.zeros(ts.shape, dtype=np.bool_)) if return_labels else None
+        # Masks of mask generators, generated on first use
+        masks = {}
+
+        report = CallReport(self.hooks, batch_size)
+
+        # Consecutive frequency domain generators share a single pair of transforms
+        spectrum = None
+        order, fire = self.draw(batch_size)
+        for position, index in enumerate(order):
+            index = int(index)
+            elem = self.generators[index]
+            # Samples of the batch the entry fires for, None if it fires for all of them
+            samples = None
+            if batch_size is None:
+                fires = fire[position]
+            else:
+                samples = np.flatnonzero(fire[:, position])
+                fires = len(samples) > 0
+                if len(samples) == batch_size:
+                    samples = None
+            if not fires:
+                report.skip(index, elem)
                 continue
-            ts = elem.generator.generate_and_combine(ts, elem.mask)
-            print(f"Applied {elem} (index: {index}).")
 
+            stopwatch = report.stopwatch()
+            phase = stopwatch.phase if stopwatch is not None else _untimed
+
+            mask = elem.mask if elem.mask is not None else mask_ts
+            if isinstance(mask, BaseGenerator):
+                if id(mask) not in masks:
+                    with phase("generate"):
+                        masks[id(mask)] = mask.generate(batch_size)
+                mask = masks[id(mask)]
+
+            generator = elem.generator
+            with phase("combine"):
+                if generator.combine_domain == "frequency":
+                    if spectrum is None:
+                        spectrum = to_frequency(ts)
+                    target = spectrum
+                else:
+                    if spectrum is not None:
+                        np.copyto(ts, to_time(spectrum, seq_len))
+                        spectrum = None
+                    target = ts
+
+            if samples is None:
+                spans = self._apply(generator, target, mask, scratch, seq_len, labels is not None, stopwatch)
+            else:
+                # Gather the samples the entry fires for, apply the generator to all of them at once, scatter back
+                with phase("combine"):
+                    selected = target[samples]
+                    selected_mask = _take(mask, samples)
+                spans = self._apply(
+                    generator, selected, selected_mask, scratch[:len(samples)], seq_len, labels is not None, stopwatch
+                )
+                with phase("combine"):
+                    target[samples] = selected
+                if spans is not None:
+                    spans[:, 0] = samples[spans[:, 0]]
+
+            report.apply(index, elem, len(samples) if samples is not None else batch_size, stopwatch)
+            if labels is not None:
+                self._label(labels, index, generator, spans)
+
+        if spectrum is not None:
+            np.copyto(ts, to_time(spectrum, seq_len))
+
+        report.end()
+        return (ts, labels) if labels is not None else ts
+
+    def init_stream(self, segment_len: int | None = None) -> dict:
+        """
+        Initial state of a stream of chunks, see `combine_chunk`.
+
+        Args:
+            segment_len (int | None): The entries that fire are drawn again every `segment_len` steps of the stream,
+                whatever the length of the chunks. If None they are drawn once for the whole stream.
+        """
+        return {"streams": {}, "position": 0, "segment_len": segment_len, "segment": None, "draw": None}
+
+    def _segments(self, state: dict, chunk_len: int, batch_size: int | None):
+        """Pieces (start, stop) of the next chunk in the same segment of the stream, with the draw of the segment."""
+        position, segment_len = state["position"], state["segment_len"]
+        start = 0
+        while start < chunk_len:
+            segment = (position + start) // segment_len if segment_len else 0
+            if state["segment"] != segment:
+                state["segment"], state["draw"] = segment, self.draw(batch_size)
+            stop = min(chunk_len, (segment + 1) * segment_len - position) if segment_len else chunk_len
+            yield start, stop, state["draw"]
+            start = stop
+
+    def combine_chunk(self, ts: np.ndarray, mask_ts: np.ndarray | IntervalMask | None = None, state: dict | None = None):
+        """
+        Apply the generators to the next chunk of a stream (see `BaseGenerator.generate_chunks`).
+
+        The entries that fire are drawn per segment of the stream (see `init_stream`), so the result doesn't depend
+        on the length of the chunks: a chunk crossing the end of a segment is applied piece by piece. Every
+        generator and mask generator advances at every chunk, whether its entry fires or not, so an anomaly that
+        fires again continues from the current time. Array and interval masks of the Maybe entries are repeated along time. Frequency domain entries
+        act on the spectrum of each piece.
+
+        Args:
+            ts (np.ndarray): Chunk of the input time series, (chunk_len, no_variates) or batched. On a batch every
+                sample draws its own entries.
+            mask_ts (np.ndarray | IntervalMask): Optional chunk of the mask used by the entries that don't have their own.
+            state (dict | None): Stream state from `init_stream`, updated in place. Chunks of a stream have the same
+                shape. If None the chunk starts a new stream.
+
+        Returns:
+            np.ndarray: the combined chunk.
+        """
+        ts = ts.astype(ts.dtype if np.issubdtype(ts.dtype, np.floating) else np.float64)
+        batch_size = ts.shape[0] if ts.ndim == 3 else None
+        chunk_len = ts.shape[-2]
+        state = state if state is not None else self.init_stream()
+        streams = state["streams"]
+        # Chunks of this call, by generator
+        chunks = {}
+
+        def chunk_of(generator: BaseGenerator) -> np.ndarray | IntervalMask:
+            if id(generator) not in chunks:
+                if id(generator) not in streams:
+                    streams[id(generator)] = generator.generate_chunks(chunk_len, batch_size=batch_size)
+                chunks[id(generator)] = next(streams[id(generator)])
+            return chunks[id(generator)]
+
+        report = CallReport(self.hooks, batch_size)
+        for start, stop, (order, fire) in self._segments(state, chunk_len, batch_size):
+            for position, index in enumerate(order):
+                index = int(index)
+                elem = self.generators[index]
+                samples = None
+                if batch_size is None:
+                    fires = fire[position]
+                else:
+                    samples = np.flatnonzero(fire[:, position])
+                    fires = len(samples) > 0
+                    if len(samples) == batch_size:
+                        samples = None
+                if not fires:
+                    report.skip(index, elem)
+                    continue
+
+                stopwatch = report.stopwatch()
+                phase = stopwatch.phase if stopwatch is not None else _untimed
+
+                generator = elem.generator
+                with phase("generate"):
+                    mask = elem.mask if elem.mask is not None else mask_ts
+                    if isinstance(mask, BaseGenerator):
+                        mask = _window(chunk_of(mask), start, stop - start)
+                    elif elem.mask is not None:
+                        mask = _window(mask, state["position"] + start, stop - start)
+                    else:
+                        mask = _window(mask, start, stop - start)
+                    generated_ts = chunk_of(generator)
+                if stopwatch is not None:
+                    stopwatch.generated_bytes += generated_ts.nbytes
+
+                with phase("combine"):
+                    # `combine` uses the generated piece as scratch memory
+                    piece = generated_ts[..., start:stop, :]
+                    if samples is None:
+                        target = ts[..., start:stop, :]
+                        generator.combine(target, piece.copy(), mask, out=target)
+                    else:
+                        selected = ts[samples, start:stop]
+                        generator.combine(selected, piece[samples], _take(mask, samples), out=selected)
+                        ts[samples, start:stop] = selected
+
+                report.apply(index, elem, len(samples) if samples is not None else batch_size, stopwatch)
+
+        # Every generator follows the stream even when its entry doesn't fire
+        for elem in self.generators:
+            for generator in (elem.generator, elem.mask):
+                if isinstance(generator, BaseGenerator):
+                    chunk_of(generator)
+
+        state["position"] += chunk_len
+        report.end()
         return ts
-        
-    
\ No newline at end of file
+
+    def _apply(
+        self,
+        generator: BaseGenerator,
+        target: np.ndarray,
+        mask_ts: np.ndarray | IntervalMask | None,
+        scratch: np.ndarray,
+        seq_len: int,
+        return_spans: bool,
+        stopwatch: Stopwatch | None = None,
+    ) -> np.ndarray | None:
+        """
+        Combine a generator in place into `target`, the TS or, for frequency domain generators, its spectrum.
+        The generate and combine phases are timed by `stopwatch`, if given.
+
+        Returns:
+            np.ndarray | None: the spans changed by the generator (see `spans_from_flags`), if `return_spans`.
+        """
+        batch_size = target.shape[0] if target.ndim == 3 else None
+        shape = (*target.shape[:-2], seq_len, target.shape[-1])
+        phase = stopwatch.phase if stopwatch is not None else _untimed
+        if generator.pointwise and mask_ts is not None and generator.combine_domain == "time":
+            # Only the masked points are drawn, the rest of the TS is left untouched. Drawing and combining are a
+            # single call, timed as combine
+            with phase("combine"):
+                _, support, values = generator.combine_on_support(target, mask_ts, out=target)
+            if stopwatch is not None:
+                stopwatch.generated_bytes += values.nbytes
+            if not return_spans:
+                return None
+            return _changed_spans(mask_ts, support, values != generator.neutral_value, shape)
+
+        with phase("generate"):
+            generated_ts = generator.generate(batch_size, out=scratch)
+        frequency = generator.combine_domain == "frequency"
+        with phase("combine"):
+            generator.combine(target, generated_ts, mask_ts, transform=not frequency, out=target)
+        if stopwatch is not None:
+            stopwatch.generated_bytes += generated_ts.nbytes
+        if not return_spans:
+            return None
+        return self._affected(generator, generated_ts, mask_ts, shape, frequency)
+
+    def _affected(
+        self,
+        generator: BaseGenerator,
+        combined_ts: np.ndarray,
+        mask_ts: np.ndarray | IntervalMask | None,
+        shape: tuple[int],
+        frequency: bool,
+    ) -> np.ndarray:
+        """
+        Spans changed by a generator, from what `combine` left in the scratch buffer (the masked generated TS).
+        Only dense combines scan the whole buffer.
+        """
+        if frequency:
+            # A change of any frequency bin changes the whole variate
+            bins = combined_ts[..., :shape[-2] // 2 + 1, :]
+            *batch, variate = np.nonzero((bins != generator.neutral_value).any(axis=-2))
+            return np.stack(
+                [*batch, np.zeros_like(variate), np.full_like(variate, shape[-2]), variate], axis=1
+            ).astype(np.int64)
+        if isinstance(mask_ts, IntervalMask):
+            # Only the masked spans hold combined values
+            index = mask_ts.indices(combined_ts.ndim)
+            return _changed_spans(mask_ts, index, combined_ts[index] != generator.neutral_value, shape)
+        return spans_from_flags(combined_ts != generator.neutral_value)
+
+    def _label(self, labels: Labels, index: int, generator: BaseGenerator, spans: np.ndarray):
+        """Record an applied generator and the spans it changed."""
+        labels.flags[IntervalMask(labels.flags.shape, spans).indices()] = True
+        labels.applied.append(AppliedGenerator(index, generator.__class__.__name__, generator.params(), spans))
+
+
+def _changed_spans(
+    mask_ts: np.ndarray | IntervalMask, index: tuple, changed: np.ndarray, shape: tuple[int]
+) -> np.ndarray:
+    """
+    Spans of the points of the mask support `index` where the combined values changed the TS (`changed`, in the
+    order of `index`). An interval mask whose points all changed gives its own spans.
+    """
+    batch_size = shape[0] if len(shape) == 3 else None
+    if isinstance(mask_ts, IntervalMask) and changed.all():
+        spans = mask_ts.spans
+        if batch_size is not None and mask_ts.ndim == 2:
+            # A single mask shared by the whole batch
+            batches = np.repeat(np.arange(batch_size), len(spans))
+            spans = np.concatenate([batches[:, None], np.tile(spans, (batch_size, 1))], axis=1)
+        return merge_spans(spans)
+
+    if isinstance(index[0], slice):
+        # A single support for the whole batch, `changed` is (batch_size, points)
+        batch, point = np.nonzero(changed)
+        return spans_from_points((batch, index[1][point], index[2][point]))
+    return spans_from_points(tuple(axis[changed] for axis in index))
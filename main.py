@@ -1,29 +1,19 @@
 import numpy as np
 from utils import displayTS, setSeed
-from generators.utils import Maybe, Some
-
-# Import all generators
-from generators.normal import NormalGenerator
-from generators.costant import CostantGenerator
-from generators.sinusoid import SinusoidGenerator
-from generators.mask_sigmoids import SigmoidMaskGenerator
-from generators.drift import DriftGenerator
-from generators.exponential import ExponentialGenerator
-from generators.gamma import GammaGenerator
-from generators.laplace import LaplaceGenerator
-from generators.poisson import PoissonGenerator
-from generators.pink_noise import PinkNoiseGenerator
+# Generator modules are imported by the registry of the package on first use
+import generators
+from generators import Maybe, Some, PrintHook
 
 if __name__ == "__main__":
     #setSeed(21)
 
     shape = (1000, 4)
 
-    raw_ts = SinusoidGenerator(
+    raw_ts = generators.SinusoidGenerator(
         shape, amplitude=0.5, phase=np.pi, max_frequency=5
     ).generate()
     
-    mask = SigmoidMaskGenerator(
+    mask = generators.SigmoidMaskGenerator(
         shape,
         num_peaks=4,
         peak_length=100,
@@ -34,49 +24,49 @@ if __name__ == "__main__":
     some = Some(
         [
             Maybe(
-                NormalGenerator(
+                generators.NormalGenerator(
                     shape, mean=0, std=0.01, combine_domain="time", combine_mode="add"
                 ),
                 mask,
                 probability=1,
             ),
             Maybe(
-                LaplaceGenerator(
+                generators.LaplaceGenerator(
                     shape, loc=0, scale=0.05, combine_domain="time", combine_mode="add"
                 ),
                 mask,
                 probability=0.7,
             ),
             Maybe(
-                ExponentialGenerator(
+                generators.ExponentialGenerator(
                     shape, scale=0.02, combine_domain="time", combine_mode="add"
                 ),
                 mask,
                 probability=0.5,
             ),
             Maybe(
-                GammaGenerator(
+                generators.GammaGenerator(
                     shape, shape_param=2.0, scale=0.01, combine_domain="time", combine_mode="add"
                 ),
                 mask,
                 probability=0.4,
             ),
             Maybe(
-                PoissonGenerator(
+                generators.PoissonGenerator(
                     shape, lam=0.5, combine_domain="time", combine_mode="add"
                 ),
                 mask,
                 probability=0.3,
             ),
             Maybe(
-                PinkNoiseGenerator(
+                generators.PinkNoiseGenerator(
                     shape, alpha=1.0, amplitude=0.1, combine_domain="time", combine_mode="add"
                 ),
                 mask,
                 probability=0.6,
             ),
             Maybe(
-                SinusoidGenerator(
+                generators.SinusoidGenerator(
                     shape,
                     amplitude=0.1,
                     phase=2 * np.pi,
@@ -88,7 +78,7 @@ if __name__ == "__main__":
                 probability=1,
             ),
             Maybe(
-                CostantGenerator(
+                generators.CostantGenerator(
                     shape,
                     gen_fraction=0.02,
                     gen_value=0.01,
@@ -101,7 +91,7 @@ if __name__ == "__main__":
                 probability=0.3,
             ),
             Maybe(
-                DriftGenerator(
+                generators.DriftGenerator(
                     shape,
                     drift_type="exponential",
                     drift_rate=0.01,
@@ -116,7 +106,7 @@ if __name__ == "__main__":
         ],
         shuffle=True,
         max_generators = 5,
-        
+        hooks=[PrintHook()],
     )
 
     ts = some.generate_and_combine(raw_ts)
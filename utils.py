@@ -1,10 +1,8 @@
-import matplotlib.pyplot as plt
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, Literal
 import numpy as np
-
-import matplotlib.pyplot as plt
-import numpy as np
-from matplotlib import rcParams
-import seaborn as sns
 import random
 
 def setSeed(seed: int):
@@ -12,24 +10,148 @@ def setSeed(seed: int):
     random.seed(seed)
 
 
-def displayTS(ts: np.ndarray, raw_ts: np.ndarray = None,  mask_ts: np.ndarray = None, save_path: str = None):
+def minmax_decimate(y: np.ndarray, n_buckets: int) -> tuple[np.ndarray, np.ndarray]:
     """
-    Display time series (ts) with optional raw time series (raw_ts).
-    
+    Keep the min and the max of every bucket of consecutive time steps, in time order, for every variate.
+    With a bucket per pixel column the plot looks the same as with all the points.
+
     Args:
-        ts (np.ndarray): Processed time series (T x N).
-        raw_ts (np.ndarray, optional): Raw time series of same shape as ts.
-        save_path (str, optional): Path to save the figure.
+        y (np.ndarray): (seq_len, no_variates) values.
+        n_buckets (int): number of buckets.
+
+    Returns:
+        tuple: (x, y) arrays of shape (2 * n_buckets, no_variates), x being the time step of every kept value.
+    """
+    seq_len, no_variates = y.shape
+    size = -(-seq_len // n_buckets)
+    full = seq_len - seq_len % size
+
+    # Whole buckets are a view of y, the last partial one (if any) is done apart
+    x = [_bucket_extremes(y[:full].reshape(-1, size, no_variates))]
+    if full < seq_len:
+        x.append(full + _bucket_extremes(y[None, full:]))
+    x = np.concatenate(x)
+    return x, np.take_along_axis(y, x, axis=0)
+
+
+def _bucket_extremes(buckets: np.ndarray) -> np.ndarray:
+    """Time steps of the min and max of every (bucket, step, variate) bucket, in time order."""
+    n_buckets, size, no_variates = buckets.shape
+    low, high = buckets.argmin(axis=1), buckets.argmax(axis=1)
+    x = np.stack([np.minimum(low, high), np.maximum(low, high)], axis=1)
+    x += np.arange(0, n_buckets * size, size)[:, None, None]
+    return x.reshape(2 * n_buckets, no_variates)
+
+
+def lttb_decimate(y: np.ndarray, n_points: int) -> tuple[np.ndarray, np.ndarray]:
     """
+    Largest-Triangle-Three-Buckets downsampling of every variate to `n_points` points.
+
+    Args:
+        y (np.ndarray): (seq_len, no_variates) values.
+        n_points (int): number of points to keep, first and last included.
+
+    Returns:
+        tuple: (x, y) arrays of shape (n_points, no_variates), x being the time step of every kept value.
+    """
+    seq_len, no_variates = y.shape
+    if n_points >= seq_len or n_points < 3:
+        x = np.broadcast_to(np.arange(seq_len)[:, None], y.shape)
+        return x, y
+
+    edges = np.linspace(1, seq_len - 1, n_points - 1).astype(int)
+    variates = np.arange(no_variates)
+    x = np.empty((n_points, no_variates), dtype=np.int64)
+    x[0], x[-1] = 0, seq_len - 1
+
+    # Buckets are sequential (each depends on the point kept in the previous one), variates are vectorized
+    for i in range(n_points - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start, next_stop = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (seq_len - 1, seq_len)
+        next_x, next_y = (next_start + next_stop - 1) / 2, y[next_start:next_stop].mean(axis=0)
+
+        previous_x = x[i]
+        previous_y = y[previous_x, variates].astype(np.float64)
+        time_steps = np.arange(start, stop)[:, None]
+        area = np.abs(
+            (previous_x - next_x) * (y[start:stop] - previous_y) - (previous_x - time_steps) * (next_y - previous_y)
+        )
+        x[i + 1] = start + area.argmax(axis=0)
+
+    return x, np.take_along_axis(y, x, axis=0)
+
+
+def _decimate(y: np.ndarray, n_points: int, method: Literal["minmax", "lttb"] | None) -> tuple[np.ndarray, np.ndarray]:
+    if method is None or len(y) <= n_points:
+        return np.broadcast_to(np.arange(len(y))[:, None], y.shape), y
+    match method:
+        case "minmax":
+            return minmax_decimate(y, max(1, n_points // 2))
+        case "lttb":
+            return lttb_decimate(y, n_points)
+        case default:
+            raise ValueError("Decimation must be either 'minmax', 'lttb' or None")
+
+
+def _active_regions(mask_ts: np.ndarray, padding: int) -> list[tuple[int, int]]:
+    """(start, end) of the runs of time steps where any variate of the mask is active, widened by `padding`."""
+    active = (mask_ts != 0).any(axis=1)
+    if padding > 0:
+        # A step is kept if an active step is at most `padding` steps away
+        counts = np.cumsum(np.concatenate([[0], active]))
+        seq_len = len(active)
+        steps = np.arange(seq_len)
+        low, high = np.maximum(steps - padding, 0), np.minimum(steps + padding + 1, seq_len)
+        active = counts[high] > counts[low]
+
+    edges = np.diff(np.concatenate([[0], active.astype(np.int8), [0]]))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+# Width of the figures in inches, height per variate
+FIGURE_WIDTH, VARIATE_HEIGHT = 12, 2.5
+
+# Lines drawn for every variate, in drawing order
+_LINES = {
+    "raw": dict(label='Raw TS', color="#1f77b4", linewidth=3),
+    "mask": dict(label='Mask TS', color="#ff7f0e", linewidth=1),
+    "ts": dict(label='TS', color="#ff357c", linewidth=1),
+}
+
+_styled = False
+
+
+def _set_style():
+    """Seaborn style and rcParams of the plots, set once per process."""
+    global _styled
+    if _styled:
+        return
+
+    # Plotting dependencies are only needed here, generation works without them
+    from matplotlib import rcParams
+    import seaborn as sns
+
     sns.set_style("whitegrid", {'grid.linestyle': '--'})
     rcParams['font.family'] = "DejaVu Sans"
     rcParams['axes.titlesize'] = 12
     rcParams['axes.labelsize'] = 10
     rcParams['legend.fontsize'] = 9
+    _styled = True
+
 
+def _prepare(
+    ts: np.ndarray,
+    raw_ts: np.ndarray | None,
+    mask_ts: np.ndarray | None,
+    max_points: int,
+    decimate: Literal["minmax", "lttb"] | None = "minmax",
+    mask_only: bool = False,
+    mask_padding: int = 0,
+) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """Validated and decimated (x, y) arrays of every given series, see `displayTS`."""
     if ts.ndim == 1:
         ts = ts.reshape(-1, 1)
-    num_variates = ts.shape[1]
+    seq_len, num_variates = ts.shape
 
     # If raw_ts is provided, validate shape
     if raw_ts is not None:
@@ -39,25 +161,54 @@ def displayTS(ts: np.ndarray, raw_ts: np.ndarray = None,  mask_ts: np.ndarray =
             f"raw_ts must have the same shape as ts, got {raw_ts.shape} vs {ts.shape}"
     
     if mask_ts is not None:
+        if not isinstance(mask_ts, np.ndarray):
+            mask_ts = mask_ts.to_dense()
         if mask_ts.ndim == 1:
             mask_ts = mask_ts.reshape(-1, 1)
         assert mask_ts.shape == ts.shape, \
             f"mask_ts must have the same shape as ts, got {mask_ts.shape}"
+    assert mask_ts is not None or not mask_only, "mask_only needs mask_ts"
 
-    fig, axes = plt.subplots(
-        num_variates, 1, figsize=(12, 2.5 * num_variates),
-        sharex=True, constrained_layout=True
-    )
+    regions = _active_regions(mask_ts, mask_padding) if mask_only else []
+    if not regions:
+        regions = [(0, seq_len)]
+    kept = sum(end - start for start, end in regions)
 
-    if num_variates == 1:
-        axes = [axes]  
+    def prepare(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Decimated (x, y) of all the variates; regions share the points in proportion to their length,
+        separated by NaN to break the lines."""
+        x_parts, y_parts = [], []
+        gap = np.full((1, num_variates), np.nan)
+        for start, end in regions:
+            x, y = _decimate(values[start:end], max(3, max_points * (end - start) // kept), decimate)
+            x_parts += [x + start, gap]
+            y_parts += [y, gap]
+        return np.concatenate(x_parts[:-1]), np.concatenate(y_parts[:-1])
 
+    series = {}
+    if raw_ts is not None:
+        series["raw"] = prepare(raw_ts)
+    if mask_ts is not None:
+        series["mask"] = prepare(mask_ts)
+    series["ts"] = prepare(ts)
+
+    if mask_ts is not None:
+        # Scaling commutes with the decimation, so only the kept points are scaled. The min/max decimation
+        # of the whole series keeps the max of every variate.
+        ts_y = series["ts"][1]
+        scale = np.nanmax(ts_y, axis=0) if decimate == "minmax" and not mask_only else np.max(ts, axis=0)
+        mask_x, mask_y = series["mask"]
+        series["mask"] = mask_x, mask_y * scale
+    return series
+
+
+def _build_figure(fig, num_variates: int, names: tuple[str, ...]) -> tuple[list, dict[str, list]]:
+    """Axes of the variates and their empty lines, filled by `_draw`."""
+    axes = fig.subplots(num_variates, 1, sharex=True, squeeze=False)[:, 0]
+    lines = {name: [] for name in names}
     for i, ax in enumerate(axes):
-        if raw_ts is not None:
-            ax.plot(raw_ts[:, i], label=f'Raw TS', color="#1f77b4", linewidth=3)
-        if mask_ts is not None:
-            ax.plot(mask_ts[:, i] * np.max(ts[:, i]), label=f'Mask TS', color="#ff7f0e", linewidth=1)
-        ax.plot(ts[:, i], label=f'TS', color="#ff357c", linewidth=1)
+        for name in names:
+            lines[name].append(ax.plot([], [], **_LINES[name])[0])
         ax.set_title(f'Variate {i+1}', fontsize=14)
         ax.set_ylabel('Value', fontsize=12)
 
@@ -65,10 +216,141 @@ def displayTS(ts: np.ndarray, raw_ts: np.ndarray = None,  mask_ts: np.ndarray =
 
     handles, labels = axes[-1].get_legend_handles_labels()
     fig.legend(handles, labels, loc='lower right', ncol=2, frameon=False, fontsize=10)
+    return axes, lines
+
+
+def _draw(axes: list, lines: dict[str, list], series: dict[str, tuple[np.ndarray, np.ndarray]]):
+    for name, (x, y) in series.items():
+        for i, line in enumerate(lines[name]):
+            line.set_data(x[:, i], y[:, i])
+    for ax in axes:
+        ax.relim()
+        ax.autoscale_view()
+
+
+def displayTS(
+    ts: np.ndarray,
+    raw_ts: np.ndarray = None,
+    mask_ts: np.ndarray = None,
+    save_path: str = None,
+    decimate: Literal["minmax", "lttb"] | None = "minmax",
+    max_points: int | None = None,
+    mask_only: bool = False,
+    mask_padding: int = 0,
+    dpi: int = 300,
+):
+    """
+    Display time series (ts) with optional raw time series (raw_ts).
+    
+    Args:
+        ts (np.ndarray): Processed time series (T x N).
+        raw_ts (np.ndarray, optional): Raw time series of same shape as ts.
+        mask_ts (np.ndarray | IntervalMask, optional): Mask of same shape as ts, drawn scaled to the max of ts.
+        save_path (str, optional): Path to save the figure.
+        decimate (str | None): Series longer than `max_points` are reduced to the min and max of every pixel
+            column ('minmax') or to `max_points` points by Largest-Triangle-Three-Buckets ('lttb'). None to plot every point.
+        max_points (int | None): Points per variate kept by the decimation. None for two per pixel column.
+        mask_only (bool): Plot only the time steps where the mask is active, the rest of the series is left out.
+        mask_padding (int): Time steps kept around the active regions of the mask, with `mask_only`.
+        dpi (int): Resolution of the saved figure.
+    """
+    import matplotlib.pyplot as plt
+    _set_style()
+
+    if max_points is None:
+        max_points = 2 * FIGURE_WIDTH * dpi
+    series = _prepare(ts, raw_ts, mask_ts, max_points, decimate, mask_only, mask_padding)
+    num_variates = series["ts"][0].shape[1]
+
+    fig = plt.figure(figsize=(FIGURE_WIDTH, VARIATE_HEIGHT * num_variates), constrained_layout=True)
+    axes, lines = _build_figure(fig, num_variates, tuple(series))
+    _draw(axes, lines, series)
 
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches="tight")
+        plt.savefig(save_path, dpi=dpi, bbox_inches="tight")
     else:
         plt.show()
     plt.close()
 
+
+# Figures of a rendering process, reused by all the samples with the same variates and series
+_figures = {}
+
+
+def _init_render_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+    _set_style()
+
+
+def _render(index: int, sample: tuple, out_dir: str, filename: str, dpi: int, max_points: int, options: dict) -> str:
+    from matplotlib.figure import Figure
+
+    ts, raw_ts, mask_ts = sample
+    series = _prepare(ts, raw_ts, mask_ts, max_points, **options)
+    num_variates = series["ts"][0].shape[1]
+
+    key = (num_variates, tuple(series))
+    if key not in _figures:
+        # Figures not managed by pyplot: no backend state, nothing to close
+        fig = Figure(figsize=(FIGURE_WIDTH, VARIATE_HEIGHT * num_variates), constrained_layout=True)
+        _figures[key] = (fig, *_build_figure(fig, num_variates, key[1]))
+    fig, axes, lines = _figures[key]
+    _draw(axes, lines, series)
+
+    path = os.path.join(out_dir, filename.format(index=index))
+    fig.savefig(path, dpi=dpi, bbox_inches="tight")
+    return path
+
+
+def _render_chunk(
+    chunk: list[tuple[int, tuple]], out_dir: str, filename: str, dpi: int, max_points: int, options: dict
+) -> list[str]:
+    return [_render(index, sample, out_dir, filename, dpi, max_points, options) for index, sample in chunk]
+
+
+def render_samples(
+    samples: Iterable[tuple[np.ndarray, np.ndarray | None, np.ndarray | None]],
+    out_dir: str,
+    workers: int | None = None,
+    filename: str = "sample_{index:05d}.png",
+    dpi: int = 100,
+    chunk_size: int | None = None,
+    **options,
+) -> list[str]:
+    """
+    Render many samples to PNG files in a process pool, as `displayTS` would save them.
+
+    Every worker uses the Agg backend, sets the style once and reuses a figure for all the samples with the same
+    number of variates, only replacing the data of its lines.
+
+    Args:
+        samples (Iterable[tuple]): (ts, raw_ts, mask_ts) triples, raw_ts and mask_ts can be None,
+            e.g. zip(*build_dataset(...)).
+        out_dir (str): Directory of the images, created if missing.
+        workers (int | None): Number of worker processes. None to use all the cores, 0 or 1 to render in the current process.
+        filename (str): Name of the images, formatted with the index of the sample.
+        dpi (int): Resolution of the images.
+        chunk_size (int | None): Number of samples rendered by each task. None to split the samples
+            in about 4 tasks per worker.
+        **options: decimate, max_points, mask_only and mask_padding, as in `displayTS`.
+
+    Returns:
+        list[str]: paths of the images, in the order of the samples.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    samples = list(enumerate(samples))
+    if workers is None:
+        workers = os.cpu_count()
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(samples) // (max(workers, 1) * 4)))
+    chunks = [samples[start:start + chunk_size] for start in range(0, len(samples), chunk_size)]
+    max_points = options.pop("max_points", None) or 2 * FIGURE_WIDTH * dpi
+    render_chunk = partial(_render_chunk, out_dir=out_dir, filename=filename, dpi=dpi, max_points=max_points, options=options)
+
+    if workers <= 1:
+        _set_style()
+        return [path for chunk in chunks for path in render_chunk(chunk)]
+
+    with ProcessPoolExecutor(workers, initializer=_init_render_worker) as executor:
+        return [path for paths in executor.map(render_chunk, chunks) for path in paths]